@@ -0,0 +1,26 @@
+"""add session pruning indexes
+
+Revision ID: 29d1dfd0de51
+Revises: f8ac6fdde515
+Create Date: 2026-10-18 19:00:28.501456
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29d1dfd0de51'
+down_revision = 'f8ac6fdde515'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sessions_expires_at', 'sessions', ['expires_at'], if_not_exists=True)
+    op.create_index('ix_sessions_is_active', 'sessions', ['is_active'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_is_active', table_name='sessions', if_exists=True)
+    op.drop_index('ix_sessions_expires_at', table_name='sessions', if_exists=True)
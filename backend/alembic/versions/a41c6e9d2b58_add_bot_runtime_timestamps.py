@@ -0,0 +1,31 @@
+"""add bot runtime timestamps
+
+Revision ID: a41c6e9d2b58
+Revises: d3e8a5f17c2b
+Create Date: 2026-10-18 20:14:37.281604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c6e9d2b58'
+down_revision = 'd3e8a5f17c2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = [column['name'] for column in sa.inspect(bind).get_columns('bots')]
+    if 'started_at' not in columns:
+        op.add_column('bots', sa.Column('started_at', sa.DateTime(), nullable=True))
+    if 'last_seen' not in columns:
+        op.add_column('bots', sa.Column('last_seen', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bots') as batch_op:
+        batch_op.drop_column('last_seen')
+        batch_op.drop_column('started_at')
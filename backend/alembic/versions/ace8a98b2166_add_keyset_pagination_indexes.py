@@ -0,0 +1,50 @@
+"""add keyset pagination indexes
+
+Revision ID: ace8a98b2166
+Revises: fcd63e483361
+Create Date: 2026-10-18 11:40:03.271946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ace8a98b2166'
+down_revision = 'fcd63e483361'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bots are paged per owner on (created_at, id), optionally filtered by status
+    op.drop_index('ix_bots_user_id_status', table_name='bots', if_exists=True)
+    op.create_index('ix_bots_user_id_created_at', 'bots', ['user_id', 'created_at', 'id'], if_not_exists=True)
+    op.create_index(
+        'ix_bots_user_id_status_created_at', 'bots', ['user_id', 'status', 'created_at', 'id'],
+        if_not_exists=True
+    )
+
+    # Payments carry their owner so history pages don't go through subscriptions
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('payments')]
+    if 'user_id' not in columns:
+        with op.batch_alter_table('payments') as batch_op:
+            batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_payments_user_id_users', 'users', ['user_id'], ['id'])
+    op.execute(
+        'UPDATE payments SET user_id = '
+        '(SELECT subscriptions.user_id FROM subscriptions WHERE subscriptions.id = payments.subscription_id) '
+        'WHERE user_id IS NULL'
+    )
+    op.create_index('ix_payments_user_id_created_at', 'payments', ['user_id', 'created_at', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_user_id_created_at', table_name='payments', if_exists=True)
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.drop_constraint('fk_payments_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
+
+    op.drop_index('ix_bots_user_id_status_created_at', table_name='bots', if_exists=True)
+    op.drop_index('ix_bots_user_id_created_at', table_name='bots', if_exists=True)
+    op.create_index('ix_bots_user_id_status', 'bots', ['user_id', 'status'], if_not_exists=True)
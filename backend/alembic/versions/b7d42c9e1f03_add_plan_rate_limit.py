@@ -0,0 +1,28 @@
+"""add plan rate limit
+
+Revision ID: b7d42c9e1f03
+Revises: 29d1dfd0de51
+Create Date: 2026-10-18 19:20:41.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d42c9e1f03'
+down_revision = '29d1dfd0de51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = [column['name'] for column in sa.inspect(bind).get_columns('pricing_plans')]
+    if 'rate_limit_per_minute' not in columns:
+        op.add_column('pricing_plans', sa.Column('rate_limit_per_minute', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('pricing_plans') as batch_op:
+        batch_op.drop_column('rate_limit_per_minute')
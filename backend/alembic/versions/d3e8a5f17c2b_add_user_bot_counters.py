@@ -0,0 +1,38 @@
+"""add user bot counters
+
+Revision ID: d3e8a5f17c2b
+Revises: b7d42c9e1f03
+Create Date: 2026-10-18 19:48:12.604915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e8a5f17c2b'
+down_revision = 'b7d42c9e1f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = [column['name'] for column in sa.inspect(bind).get_columns('users')]
+    if 'bots_count' not in columns:
+        op.add_column('users', sa.Column('bots_count', sa.Integer(), nullable=False, server_default='0'))
+    if 'active_bots_count' not in columns:
+        op.add_column('users', sa.Column('active_bots_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the bots table
+    op.execute(
+        "UPDATE users SET "
+        "bots_count = (SELECT count(*) FROM bots WHERE bots.user_id = users.id), "
+        "active_bots_count = (SELECT count(*) FROM bots WHERE bots.user_id = users.id AND bots.status = 'online')"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('active_bots_count')
+        batch_op.drop_column('bots_count')
@@ -0,0 +1,60 @@
+"""key sessions by token hash
+
+Revision ID: f8ac6fdde515
+Revises: ace8a98b2166
+Create Date: 2026-10-18 18:59:23.448047
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8ac6fdde515'
+down_revision = 'ace8a98b2166'
+branch_labels = None
+depends_on = None
+
+
+def hash_token(token: str) -> str:
+    # Must match Session.hash_token()
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = [column['name'] for column in sa.inspect(bind).get_columns('sessions')]
+    if 'token' not in columns:
+        return
+
+    op.add_column('sessions', sa.Column('token_hash', sa.String(length=32), nullable=True))
+
+    # Backfill the digest of every stored JWT
+    sessions = sa.table('sessions', sa.column('id', sa.Integer), sa.column('token', sa.String),
+                        sa.column('token_hash', sa.String))
+    rows = bind.execute(sa.select(sessions.c.id, sessions.c.token)).all()
+    if rows:
+        bind.execute(
+            sessions.update().where(sessions.c.id == sa.bindparam('session_id')),
+            [{'session_id': row.id, 'token_hash': hash_token(row.token)} for row in rows]
+        )
+
+    op.drop_index('ix_sessions_token', table_name='sessions', if_exists=True)
+    with op.batch_alter_table('sessions') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=32), nullable=False)
+        batch_op.drop_column('token')
+    op.create_index('ix_sessions_token_hash', 'sessions', ['token_hash'], unique=True)
+
+
+def downgrade() -> None:
+    # JWTs cannot be recovered from their digest, the hash is kept as a placeholder
+    # so the restored column stays unique and non-null; those sessions can't be used.
+    op.add_column('sessions', sa.Column('token', sa.String(), nullable=True))
+    op.execute('UPDATE sessions SET token = token_hash')
+    op.drop_index('ix_sessions_token_hash', table_name='sessions', if_exists=True)
+    with op.batch_alter_table('sessions') as batch_op:
+        batch_op.alter_column('token', existing_type=sa.String(), nullable=False)
+        batch_op.drop_column('token_hash')
+    op.create_index('ix_sessions_token', 'sessions', ['token'], unique=True)
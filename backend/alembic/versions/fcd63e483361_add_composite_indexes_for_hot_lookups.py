@@ -0,0 +1,34 @@
+"""add composite indexes for hot lookups
+
+Revision ID: fcd63e483361
+Revises: 041ead4b2ea1
+Create Date: 2026-10-18 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fcd63e483361'
+down_revision = '041ead4b2ea1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables created by create_all() on startup may already carry these indexes
+    op.create_index('ix_bots_user_id_status', 'bots', ['user_id', 'status'], if_not_exists=True)
+    op.create_index('ix_subscriptions_user_id_status', 'subscriptions', ['user_id', 'status'], if_not_exists=True)
+    op.create_index(
+        'ix_payments_subscription_id_created_at', 'payments', ['subscription_id', 'created_at'],
+        if_not_exists=True
+    )
+    op.create_index('ix_sessions_user_id_is_active', 'sessions', ['user_id', 'is_active'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_user_id_is_active', table_name='sessions', if_exists=True)
+    op.drop_index('ix_payments_subscription_id_created_at', table_name='payments', if_exists=True)
+    op.drop_index('ix_subscriptions_user_id_status', table_name='subscriptions', if_exists=True)
+    op.drop_index('ix_bots_user_id_status', table_name='bots', if_exists=True)
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
-from ..core.database import get_db
-from ..core.security import verify_telegram_auth, verify_telegram_auth_date, create_access_token
+from ..core.database import get_db, upsert_insert
+from ..core.security import verify_telegram_auth, verify_telegram_auth_date, create_access_token, revoke_token
+from ..core.user_cache import cache_user_identity
 from ..middleware.rate_limiter import auth_rate_limiter
 from ..schemas.auth import TelegramLoginRequest, LoginResponse, LogoutRequest
 from ..schemas.user import UserCreate, UserResponse
@@ -12,10 +14,13 @@ from ..models.session import Session as UserSession
 
 router = APIRouter()
 
+# Telegram profile fields refreshed on every login
+PROFILE_FIELDS = ("username", "first_name", "last_name", "photo_url")
+
 @router.post("/telegram", response_model=LoginResponse, dependencies=[Depends(auth_rate_limiter)])
 async def telegram_login(
     login_data: TelegramLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> LoginResponse:
     """
     Authenticate user with Telegram login data
@@ -37,38 +42,14 @@ async def telegram_login(
             detail="Authentication data expired"
         )
     
-    # Get or create user
-    telegram_id = str(auth_data.get("id"))
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
-    
-    if not user:
-        # Create new user
-        user_create = UserCreate(
-            telegram_id=telegram_id,
-            username=auth_data.get("username"),
-            first_name=auth_data.get("first_name"),
-            last_name=auth_data.get("last_name"),
-            photo_url=auth_data.get("photo_url")
-        )
-        
-        user = User(
-            telegram_id=user_create.telegram_id,
-            username=user_create.username,
-            first_name=user_create.first_name,
-            last_name=user_create.last_name,
-            photo_url=user_create.photo_url
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    else:
-        # Update existing user data
-        user.username = auth_data.get("username")
-        user.first_name = auth_data.get("first_name")
-        user.last_name = auth_data.get("last_name")
-        user.photo_url = auth_data.get("photo_url")
-        db.commit()
-        db.refresh(user)
+    # Insert or refresh the user, rewriting profile fields only when they changed
+    user = await upsert_telegram_user(db, UserCreate(
+        telegram_id=str(auth_data.get("id")),
+        username=auth_data.get("username"),
+        first_name=auth_data.get("first_name"),
+        last_name=auth_data.get("last_name"),
+        photo_url=auth_data.get("photo_url")
+    ))
     
     # Create access token
     access_token_expires = timedelta(minutes=30)
@@ -77,53 +58,115 @@ async def telegram_login(
         expires_delta=access_token_expires
     )
     
-    # Create new session
+    # Create new session in the same transaction as the user upsert
     session = UserSession(
         user_id=user.id,
-        token=access_token,
+        token_hash=UserSession.hash_token(access_token),
         expires_at=datetime.utcnow() + access_token_expires,
         user_agent=None,  # Add user agent if needed
         ip_address=None   # Add IP address if needed
     )
     db.add(session)
-    db.commit()
+    await db.commit()
+    cache_user_identity(user)
     
     return LoginResponse(
         user=UserResponse.model_validate(user),
         token={"access_token": access_token, "token_type": "bearer", "expires_in": 1800}
     )
 
+async def upsert_telegram_user(db: AsyncSession, user_create: UserCreate) -> User:
+    """
+    INSERT ... ON CONFLICT (telegram_id) DO UPDATE for a Telegram login
+    The update only fires when a profile field differs, so a repeat login with
+    unchanged data writes nothing for the user row. Does not commit.
+    """
+    now = datetime.utcnow()
+    insert = upsert_insert(db.get_bind().dialect.name)
+    if insert is None:
+        return await select_then_insert_telegram_user(db, user_create, now)
+    
+    statement = insert(User).values(
+        **user_create.model_dump(),
+        is_active=True,
+        created_at=now,
+        updated_at=now
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={
+            **{field: statement.excluded[field] for field in PROFILE_FIELDS},
+            "updated_at": now
+        },
+        where=or_(*(
+            getattr(User, field).is_distinct_from(statement.excluded[field])
+            for field in PROFILE_FIELDS
+        ))
+    ).returning(User)
+    
+    user = await db.scalar(statement, execution_options={"populate_existing": True})
+    if user is None:
+        # Nothing changed, so the conflicting row was left untouched and not returned
+        user = await db.scalar(select(User).where(User.telegram_id == user_create.telegram_id))
+    return user
+
+async def select_then_insert_telegram_user(db: AsyncSession, user_create: UserCreate, now: datetime) -> User:
+    """
+    upsert_telegram_user for dialects without ON CONFLICT: read the user, then
+    insert it or update the profile fields that differ. Does not commit.
+    """
+    user = await db.scalar(select(User).where(User.telegram_id == user_create.telegram_id))
+    if user is None:
+        user = User(**user_create.model_dump(), is_active=True, created_at=now, updated_at=now)
+        db.add(user)
+        await db.flush()
+        return user
+    
+    changes = {
+        field: getattr(user_create, field) for field in PROFILE_FIELDS
+        if getattr(user, field) != getattr(user_create, field)
+    }
+    if changes:
+        for field, value in changes.items():
+            setattr(user, field, value)
+        user.updated_at = now
+        await db.flush()
+    return user
+
 @router.post("/logout")
 async def logout(
     logout_data: LogoutRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Logout user and invalidate session
     """
-    session = db.query(UserSession).filter(
-        UserSession.token == logout_data.token,
+    # Drop cached claims first so the token stops authenticating right away
+    revoke_token(logout_data.token)
+    
+    session = await db.scalar(select(UserSession).where(
+        UserSession.token_hash == UserSession.hash_token(logout_data.token),
         UserSession.is_active == True
-    ).first()
+    ))
     
     if session:
         session.is_active = False
-        db.commit()
+        await db.commit()
     
     return {"message": "Successfully logged out"}
 
 @router.post("/refresh-token")
 async def refresh_token(
     current_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Refresh access token
     """
-    session = db.query(UserSession).filter(
-        UserSession.token == current_token,
+    session = await db.scalar(select(UserSession).where(
+        UserSession.token_hash == UserSession.hash_token(current_token),
         UserSession.is_active == True
-    ).first()
+    ))
     
     if not session or not session.is_valid():
         raise HTTPException(
@@ -139,9 +182,9 @@ async def refresh_token(
     )
     
     # Update session
-    session.token = new_token
+    session.token_hash = UserSession.hash_token(new_token)
     session.expires_at = datetime.utcnow() + access_token_expires
-    db.commit()
+    await db.commit()
     
     return {
         "access_token": new_token,
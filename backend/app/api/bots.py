@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from ..core.database import get_db
-from ..core.security import get_current_user
-from ..models.user import User
-from ..models.bot import Bot
+from ..core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from ..core.user_cache import UserIdentity
+from ..middleware.auth import get_current_identity
+from ..models.bot import Bot, BOT_LIST_LOAD, BOT_AUTH_LOAD, BOT_RUNTIME_LOAD
 from ..schemas.bot import (
     BotCreate, BotUpdate, BotResponse, BotList,
     ProxySettings, PromotionSettings
 )
+from ..services.bot_shards import bot_runtime
 from ..services.telethon_service import telethon_service
 
 router = APIRouter()
@@ -17,8 +20,8 @@ router = APIRouter()
 async def create_bot(
     bot_data: BotCreate,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new userbot"""
     # Start authentication process
@@ -27,7 +30,8 @@ async def create_bot(
         phone_number=bot_data.phone_number,
         api_id=bot_data.api_id,
         api_hash=bot_data.api_hash,
-        proxy_config=bot_data.proxy_settings.dict() if bot_data.proxy_settings else None
+        proxy_config=bot_data.proxy_settings.dict() if bot_data.proxy_settings else None,
+        user_id=current_user.id
     )
     
     if auth_result["status"] == "error":
@@ -57,8 +61,8 @@ async def create_bot(
         bot.promotion_settings = bot_data.promotion_settings.dict()
     
     db.add(bot)
-    db.commit()
-    db.refresh(bot)
+    await db.commit()
+    await db.refresh(bot)
     
     return bot
 
@@ -67,11 +71,15 @@ async def verify_code(
     bot_id: int,
     phone_code: str,
     phone_code_hash: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify phone code for bot authentication"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(
+        select(Bot)
+        .options(*BOT_AUTH_LOAD)
+        .where(Bot.id == bot_id, Bot.user_id == current_user.id)
+    )
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
@@ -82,6 +90,7 @@ async def verify_code(
         api_hash=bot.api_hash,
         phone_code=phone_code,
         phone_code_hash=phone_code_hash,
+        user_id=current_user.id,
         proxy_config={
             'enabled': bot.proxy_enabled,
             'type': bot.proxy_type,
@@ -95,7 +104,7 @@ async def verify_code(
     if result["status"] == "authenticated":
         bot.session_string = result["session_string"]
         bot.status = "offline"
-        db.commit()
+        await db.commit()
         return {"status": "success", "message": "Bot verified successfully"}
     
     return result
@@ -104,11 +113,15 @@ async def verify_code(
 async def verify_password(
     bot_id: int,
     password: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify 2FA password for bot authentication"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(
+        select(Bot)
+        .options(*BOT_AUTH_LOAD)
+        .where(Bot.id == bot_id, Bot.user_id == current_user.id)
+    )
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
@@ -117,6 +130,8 @@ async def verify_password(
         api_id=bot.api_id,
         api_hash=bot.api_hash,
         password=password,
+        phone_number=bot.phone_number,
+        user_id=current_user.id,
         proxy_config={
             'enabled': bot.proxy_enabled,
             'type': bot.proxy_type,
@@ -130,7 +145,7 @@ async def verify_password(
     if result["status"] == "authenticated":
         bot.session_string = result["session_string"]
         bot.status = "offline"
-        db.commit()
+        await db.commit()
         return {"status": "success", "message": "Bot verified successfully"}
     
     return result
@@ -138,21 +153,25 @@ async def verify_password(
 @router.post("/bots/{bot_id}/start")
 async def start_bot(
     bot_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Start a userbot"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(
+        select(Bot)
+        .options(*BOT_RUNTIME_LOAD)
+        .where(Bot.id == bot_id, Bot.user_id == current_user.id)
+    )
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
     if not bot.session_string:
         raise HTTPException(status_code=400, detail="Bot not authenticated")
     
-    success = await telethon_service.start_bot(bot)
+    success = await bot_runtime.start_bot(bot)
     if success:
         bot.status = "online"
-        db.commit()
+        await db.commit()
         return {"status": "success", "message": "Bot started successfully"}
     
     raise HTTPException(status_code=500, detail="Failed to start bot")
@@ -160,42 +179,61 @@ async def start_bot(
 @router.post("/bots/{bot_id}/stop")
 async def stop_bot(
     bot_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Stop a userbot"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(select(Bot).where(Bot.id == bot_id, Bot.user_id == current_user.id))
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
-    success = await telethon_service.stop_bot(bot.id)
+    success = await bot_runtime.stop_bot(bot.id)
     if success:
         bot.status = "offline"
-        db.commit()
+        await db.commit()
         return {"status": "success", "message": "Bot stopped successfully"}
     
     raise HTTPException(status_code=500, detail="Failed to stop bot")
 
 @router.get("/bots", response_model=BotList)
 async def list_bots(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = Query(None, description="Only return bots with this status"),
+    include_total: bool = Query(False, description="Also count every matching bot"),
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all userbots for current user"""
-    bots = db.query(Bot).filter(Bot.user_id == current_user.id).all()
+    """List userbots for current user, oldest first, one keyset page at a time"""
+    filters = [Bot.user_id == current_user.id]
+    if status is not None:
+        filters.append(Bot.status == status)
+    
+    query = keyset_page(
+        select(Bot).options(*BOT_LIST_LOAD).where(*filters),
+        Bot.created_at, Bot.id, cursor, limit
+    )
+    bots, next_cursor = split_page((await db.scalars(query)).all(), limit)
+    
+    # Index-only count over (user_id[, status]), skipped unless asked for
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(Bot).where(*filters))
+    
     return {
-        "total": len(bots),
-        "items": bots
+        "total": total,
+        "items": bots,
+        "next_cursor": next_cursor
     }
 
 @router.get("/bots/{bot_id}", response_model=BotResponse)
 async def get_bot(
     bot_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get userbot details"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(select(Bot).where(Bot.id == bot_id, Bot.user_id == current_user.id))
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     return bot
@@ -204,11 +242,11 @@ async def get_bot(
 async def update_bot(
     bot_id: int,
     bot_data: BotUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update userbot settings"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(select(Bot).where(Bot.id == bot_id, Bot.user_id == current_user.id))
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
@@ -229,33 +267,38 @@ async def update_bot(
     if bot_data.promotion_settings:
         bot.promotion_settings = bot_data.promotion_settings.dict()
     
-    db.commit()
-    db.refresh(bot)
+    await db.commit()
     
-    # Restart bot if it's running to apply new settings
+    # Apply new settings to a running bot
     if bot.status == "online":
-        await telethon_service.stop_bot(bot.id)
-        await telethon_service.start_bot(bot)
+        if bot_data.proxy_settings:
+            # Proxy changes need a new connection; credentials are only read then
+            await db.refresh(bot, attribute_names=["session_string", "proxy_password"])
+            await bot_runtime.stop_bot(bot.id)
+            await bot_runtime.start_bot(bot)
+        elif bot_data.promotion_settings:
+            # Rescheduled in place, the client stays connected
+            await bot_runtime.update_promotion(bot.id, bot.promotion_settings)
     
     return bot
 
 @router.delete("/bots/{bot_id}")
 async def delete_bot(
     bot_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a userbot"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(select(Bot).where(Bot.id == bot_id, Bot.user_id == current_user.id))
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
     # Stop bot if running
     if bot.status == "online":
-        await telethon_service.stop_bot(bot.id)
+        await bot_runtime.stop_bot(bot.id)
     
-    db.delete(bot)
-    db.commit()
+    await db.delete(bot)
+    await db.commit()
     
     return {"status": "success", "message": "Bot deleted successfully"}
 
@@ -264,18 +307,18 @@ async def send_test_message(
     bot_id: int,
     target: str,
     message: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ):
     """Send a test message from the bot"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    bot = await db.scalar(select(Bot).where(Bot.id == bot_id, Bot.user_id == current_user.id))
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
     if bot.status != "online":
         raise HTTPException(status_code=400, detail="Bot is not running")
     
-    success = await telethon_service.send_test_message(bot.id, target, message)
+    success = await bot_runtime.send_test_message(bot.id, target, message)
     if success:
         return {"status": "success", "message": "Test message sent successfully"}
     
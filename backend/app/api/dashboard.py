@@ -0,0 +1,78 @@
+import asyncio
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.database import get_db
+from ..core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from ..core.user_cache import UserIdentity
+from ..middleware.auth import get_current_identity
+from ..middleware.rate_limiter import user_rate_limiter
+from ..models.bot import Bot, BOT_LIST_LOAD
+from ..models.subscription import Payment
+from ..models.user import User
+from ..schemas.bot import BotList, BotSummary
+from ..schemas.dashboard import DashboardResponse, PaymentSummary
+from ..services.bot_shards import bot_runtime
+from .users import build_profile, missing_user, profile_query
+
+router = APIRouter()
+
+# Seconds to wait for one bot's live state before reporting it as unknown
+LIVE_STATE_TIMEOUT = 5
+
+async def live_state(bot_id: int) -> dict:
+    try:
+        return await asyncio.wait_for(bot_runtime.get_bot_info(bot_id), LIVE_STATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": "timeout", "info": None}
+
+@router.get("", response_model=DashboardResponse, dependencies=[Depends(user_rate_limiter)])
+async def get_dashboard(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Bots on the first page"),
+    live: bool = Query(False, description="Also ask Telegram for the live state of running bots"),
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
+) -> DashboardResponse:
+    """
+    Everything the dashboard shows, behind one authentication and rate-limit check
+    Two statements: the profile row with its active subscription, plan and
+    payment summary, then the first keyset page of bots.
+    """
+    row = (await db.execute(
+        profile_query(current_user.id).add_columns(
+            select(func.count(Payment.id)).where(Payment.user_id == User.id).scalar_subquery(),
+            select(func.coalesce(func.sum(Payment.amount), 0)).where(Payment.user_id == User.id).scalar_subquery(),
+            select(func.max(Payment.created_at)).where(Payment.user_id == User.id).scalar_subquery()
+        )
+    )).first()
+    if row is None:
+        raise missing_user(current_user.id)
+    user, subscription, payment_count, payment_total, last_payment_at = row
+
+    query = keyset_page(
+        select(Bot).options(*BOT_LIST_LOAD).where(Bot.user_id == current_user.id),
+        Bot.created_at, Bot.id, None, limit
+    )
+    bots, next_cursor = split_page((await db.scalars(query)).all(), limit)
+
+    live_states = None
+    if live:
+        # Only bots with a connected client can report anything
+        running = await bot_runtime.running_bots([bot.id for bot in bots])
+        states = await asyncio.gather(*(live_state(bot_id) for bot_id in running))
+        live_states = dict(zip(running, states))
+
+    return DashboardResponse(
+        user=build_profile(user, subscription),
+        bots=BotList(
+            total=user.bots_count,
+            items=[BotSummary.model_validate(bot) for bot in bots],
+            next_cursor=next_cursor
+        ),
+        payments=PaymentSummary(
+            count=payment_count,
+            total_amount=payment_total,
+            last_payment_at=last_payment_at
+        ),
+        live=live_states
+    )
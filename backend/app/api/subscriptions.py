@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 from datetime import datetime, timedelta
 from ..core.database import get_db
-from ..middleware.auth import get_current_active_user
-from ..middleware.rate_limiter import api_rate_limiter
+from ..core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from ..core.plans_cache import etag_matches, plans_cache
+from ..core.quota_cache import quota_cache
+from ..core.user_cache import UserIdentity
+from ..middleware.auth import get_current_identity
+from ..middleware.rate_limiter import api_rate_limiter, user_rate_limiter
 from ..schemas.subscription import (
     PricingPlanResponse,
     SubscriptionResponse,
@@ -12,38 +18,51 @@ from ..schemas.subscription import (
     PricingPlansResponse,
     SubscriptionWithPayments,
     PaymentCreate,
-    PaymentResponse
+    PaymentResponse,
+    PaymentList
 )
-from ..models.user import User
 from ..models.subscription import PricingPlan, Subscription, Payment
 
 router = APIRouter()
 
 @router.get("/plans", response_model=PricingPlansResponse, dependencies=[Depends(api_rate_limiter)])
 async def get_pricing_plans(
-    db: Session = Depends(get_db)
-) -> PricingPlansResponse:
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Get all active pricing plans
+    Served as cached JSON bytes with a strong ETag; a matching If-None-Match gets 304
     """
-    plans = db.query(PricingPlan).filter(PricingPlan.is_active == True).all()
-    return PricingPlansResponse(
-        plans=[PricingPlanResponse.model_validate(plan) for plan in plans],
-        total=len(plans)
-    )
+    async def serialize_plans() -> bytes:
+        plans = (await db.scalars(select(PricingPlan).where(PricingPlan.is_active == True))).all()
+        return PricingPlansResponse(
+            plans=[PricingPlanResponse.model_validate(plan) for plan in plans],
+            total=len(plans)
+        ).model_dump_json().encode()
+    
+    body, etag = await plans_cache.get(serialize_plans)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-@router.get("/current", response_model=SubscriptionWithPayments, dependencies=[Depends(api_rate_limiter)])
+@router.get("/current", response_model=SubscriptionWithPayments, dependencies=[Depends(user_rate_limiter)])
 async def get_current_subscription(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ) -> SubscriptionWithPayments:
     """
     Get current user's subscription with payment history
     """
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.status == "active"
-    ).first()
+    subscription = await db.scalar(
+        select(Subscription)
+        .options(selectinload(Subscription.plan))
+        .where(
+            Subscription.user_id == current_user.id,
+            Subscription.status == "active"
+        )
+    )
     
     if not subscription:
         raise HTTPException(
@@ -52,29 +71,31 @@ async def get_current_subscription(
         )
     
     # Get payment history
-    payments = db.query(Payment).filter(
-        Payment.subscription_id == subscription.id
-    ).order_by(Payment.created_at.desc()).all()
+    payments = (await db.scalars(
+        select(Payment)
+        .where(Payment.subscription_id == subscription.id)
+        .order_by(Payment.created_at.desc())
+    )).all()
     
     return SubscriptionWithPayments(
         **subscription.__dict__,
         payments=[PaymentResponse.model_validate(payment) for payment in payments]
     )
 
-@router.post("/subscribe", response_model=SubscriptionResponse, dependencies=[Depends(api_rate_limiter)])
+@router.post("/subscribe", response_model=SubscriptionResponse, dependencies=[Depends(user_rate_limiter)])
 async def subscribe_to_plan(
     subscribe_data: SubscribeRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ) -> SubscriptionResponse:
     """
     Subscribe to a pricing plan
     """
     # Check if plan exists
-    plan = db.query(PricingPlan).filter(
+    plan = await db.scalar(select(PricingPlan).where(
         PricingPlan.id == subscribe_data.plan_id,
         PricingPlan.is_active == True
-    ).first()
+    ))
     
     if not plan:
         raise HTTPException(
@@ -83,10 +104,10 @@ async def subscribe_to_plan(
         )
     
     # Cancel current subscription if exists
-    current_subscription = db.query(Subscription).filter(
+    current_subscription = await db.scalar(select(Subscription).where(
         Subscription.user_id == current_user.id,
         Subscription.status == "active"
-    ).first()
+    ))
     if current_subscription:
         current_subscription.status = "cancelled"
         current_subscription.auto_renew = False
@@ -94,7 +115,7 @@ async def subscribe_to_plan(
     # Create new subscription
     subscription = Subscription(
         user_id=current_user.id,
-        plan_id=plan.id,
+        plan=plan,
         status="pending",
         payment_method=subscribe_data.payment_method,
         started_at=datetime.utcnow(),
@@ -102,17 +123,17 @@ async def subscribe_to_plan(
     )
     
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
+    await db.commit()
     
     # Create payment record
     payment = Payment(
         subscription_id=subscription.id,
+        user_id=current_user.id,
         amount=plan.price,
         currency=plan.currency,
         payment_method=subscribe_data.payment_method,
         transaction_id=f"PAYMENT_{datetime.utcnow().timestamp()}",  # Replace with actual payment processing
-        metadata=subscribe_data.payment_data
+        payment_metadata=subscribe_data.payment_data
     )
     
     db.add(payment)
@@ -120,23 +141,23 @@ async def subscribe_to_plan(
     # Update subscription status after payment
     subscription.status = "active"
     
-    db.commit()
-    db.refresh(subscription)
+    await db.commit()
+    quota_cache.invalidate(current_user.id)
     
     return SubscriptionResponse.model_validate(subscription)
 
-@router.post("/cancel", dependencies=[Depends(api_rate_limiter)])
+@router.post("/cancel", dependencies=[Depends(user_rate_limiter)])
 async def cancel_subscription(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Cancel current subscription
     """
-    subscription = db.query(Subscription).filter(
+    subscription = await db.scalar(select(Subscription).where(
         Subscription.user_id == current_user.id,
         Subscription.status == "active"
-    ).first()
+    ))
     
     if not subscription:
         raise HTTPException(
@@ -146,37 +167,54 @@ async def cancel_subscription(
     
     subscription.status = "cancelled"
     subscription.auto_renew = False
-    db.commit()
+    await db.commit()
+    quota_cache.invalidate(current_user.id)
     
     return {"message": "Subscription successfully cancelled"}
 
-@router.get("/payments", response_model=List[PaymentResponse], dependencies=[Depends(api_rate_limiter)])
+@router.get("/payments", response_model=PaymentList, dependencies=[Depends(user_rate_limiter)])
 async def get_payment_history(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-) -> List[PaymentResponse]:
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = Query(False, description="Also count every payment"),
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
+) -> PaymentList:
     """
-    Get payment history for current user
+    Get payment history for current user, newest first, one keyset page at a time
     """
-    payments = db.query(Payment).join(Subscription).filter(
-        Subscription.user_id == current_user.id
-    ).order_by(Payment.created_at.desc()).all()
+    query = keyset_page(
+        select(Payment).where(Payment.user_id == current_user.id),
+        Payment.created_at, Payment.id, cursor, limit,
+        descending=True
+    )
+    payments, next_cursor = split_page((await db.scalars(query)).all(), limit)
     
-    return [PaymentResponse.model_validate(payment) for payment in payments]
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(Payment).where(Payment.user_id == current_user.id)
+        )
+    
+    return PaymentList(
+        total=total,
+        items=[PaymentResponse.model_validate(payment) for payment in payments],
+        next_cursor=next_cursor
+    )
 
-@router.post("/payments/verify", dependencies=[Depends(api_rate_limiter)])
+@router.post("/payments/verify", dependencies=[Depends(user_rate_limiter)])
 async def verify_payment(
     payment_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Verify a payment status
     """
-    payment = db.query(Payment).join(Subscription).filter(
+    payment = await db.scalar(select(Payment).join(Subscription).where(
         Payment.id == payment_id,
         Subscription.user_id == current_user.id
-    ).first()
+    ))
     
     if not payment:
         raise HTTPException(
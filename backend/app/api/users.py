@@ -1,62 +1,76 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import Optional
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from ..core.database import get_db
-from ..middleware.auth import get_current_active_user
-from ..middleware.rate_limiter import api_rate_limiter
+from ..core.quota_cache import quota_cache
+from ..core.user_cache import UserIdentity, cache_user_identity, user_cache
+from ..middleware.auth import get_current_active_user, get_current_identity
+from ..middleware.rate_limiter import user_rate_limiter
 from ..schemas.user import UserProfile, UserUpdate, UserResponse
 from ..models.user import User
 from ..models.bot import Bot
-from ..models.subscription import Subscription
+from ..models.subscription import Payment, Subscription
 
 router = APIRouter()
 
-@router.get("/profile", response_model=UserProfile, dependencies=[Depends(api_rate_limiter)])
+def profile_query(user_id: int):
+    """The user row (with its maintained bot counters) outer joined to the active subscription and its plan"""
+    return (
+        select(User, Subscription)
+        .outerjoin(Subscription, and_(Subscription.user_id == User.id, Subscription.status == "active"))
+        .options(joinedload(Subscription.plan))
+        .where(User.id == user_id)
+        .limit(1)
+    )
+
+def build_profile(user: User, subscription: Optional[Subscription]) -> UserProfile:
+    return UserProfile(
+        id=user.id,
+        telegram_id=user.telegram_id,
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        photo_url=user.photo_url,
+        is_active=user.is_active,
+        subscription_id=subscription.id if subscription else None,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        subscription=subscription,
+        bots_count=user.bots_count,
+        active_bots_count=user.active_bots_count
+    )
+
+def missing_user(user_id: int) -> HTTPException:
+    """The token's user disappeared between authentication and the query"""
+    user_cache.invalidate(user_id)
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+@router.get("/profile", response_model=UserProfile, dependencies=[Depends(user_rate_limiter)])
 async def get_user_profile(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
 ) -> UserProfile:
     """
     Get current user's profile with subscription and bot statistics
+    Served by a single statement, see profile_query()
     """
-    # Get bot counts
-    total_bots = db.query(func.count(Bot.id)).filter(Bot.user_id == current_user.id).scalar()
-    active_bots = db.query(func.count(Bot.id)).filter(
-        Bot.user_id == current_user.id,
-        Bot.status == "online"
-    ).scalar()
-    
-    # Get subscription if exists
-    subscription = None
-    if current_user.subscription_id:
-        subscription = db.query(Subscription).filter(
-            Subscription.id == current_user.subscription_id
-        ).first()
-    
-    # Create profile response
-    profile = UserProfile(
-        id=current_user.id,
-        telegram_id=current_user.telegram_id,
-        username=current_user.username,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        photo_url=current_user.photo_url,
-        is_active=current_user.is_active,
-        subscription_id=current_user.subscription_id,
-        created_at=current_user.created_at,
-        updated_at=current_user.updated_at,
-        subscription=subscription,
-        bots_count=total_bots or 0,
-        active_bots_count=active_bots or 0
-    )
+    row = (await db.execute(profile_query(current_user.id))).first()
+    if row is None:
+        raise missing_user(current_user.id)
     
-    return profile
+    return build_profile(*row)
 
-@router.put("/profile", response_model=UserResponse, dependencies=[Depends(api_rate_limiter)])
+@router.put("/profile", response_model=UserResponse, dependencies=[Depends(user_rate_limiter)])
 async def update_user_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> UserResponse:
     """
     Update current user's profile
@@ -67,41 +81,43 @@ async def update_user_profile(
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    cache_user_identity(current_user)
     
     return UserResponse.model_validate(current_user)
 
-@router.delete("/profile", dependencies=[Depends(api_rate_limiter)])
+@router.delete("/profile", dependencies=[Depends(user_rate_limiter)])
 async def delete_user_account(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Delete current user's account and all associated data
     """
+    user_id = current_user.id
+    
     # Delete all user's bots
-    db.query(Bot).filter(Bot.user_id == current_user.id).delete()
+    await db.execute(delete(Bot).where(Bot.user_id == user_id))
     
     # Delete all user's sessions
     from ..models.session import Session as UserSession
-    db.query(UserSession).filter(UserSession.user_id == current_user.id).delete()
+    await db.execute(delete(UserSession).where(UserSession.user_id == user_id))
     
-    # Cancel subscription if exists
-    if current_user.subscription_id:
-        subscription = db.query(Subscription).filter(
-            Subscription.id == current_user.subscription_id
-        ).first()
-        if subscription:
-            subscription.status = "cancelled"
+    # Delete the user's subscriptions, the active one included, and their payments
+    subscription_ids = select(Subscription.id).where(Subscription.user_id == user_id)
+    await db.execute(delete(Payment).where(Payment.subscription_id.in_(subscription_ids)))
+    await db.execute(delete(Subscription).where(Subscription.user_id == user_id))
     
     # Delete user
-    db.delete(current_user)
-    db.commit()
+    await db.delete(current_user)
+    await db.commit()
+    user_cache.invalidate(user_id)
+    quota_cache.invalidate(user_id)
     
     return {"message": "Account successfully deleted"}
 
-@router.get("/me", response_model=UserResponse, dependencies=[Depends(api_rate_limiter)])
+@router.get("/me", response_model=UserResponse, dependencies=[Depends(user_rate_limiter)])
 async def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
 ) -> UserResponse:
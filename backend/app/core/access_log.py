@@ -0,0 +1,123 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class AccessLogger:
+    """
+    Structured access log written as JSON lines by a background thread
+    Request handlers only enqueue a dict: formatting and the blocking write
+    happen off the event loop. The queue is bounded, records that don't fit
+    are counted in dropped instead of waiting. Errors (status >= 400) and
+    slow requests are always kept, other responses are kept with probability
+    sample_rate.
+    """
+    def __init__(self, path: str = "", sample_rate: float = 1.0, slow_ms: float = 1000,
+                 buffer_size: int = 10000):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=buffer_size)
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+
+    def should_log(self, status: int, duration_ms: float) -> bool:
+        if status >= 400 or duration_ms >= self.slow_ms:
+            return True
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """Queue record for writing, returns False if the buffer was full"""
+        if self.thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="access-log", daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Flush queued records and stop the writer thread, waiting at most timeout seconds
+        A stuck writer is left behind (it is a daemon thread) rather than hanging shutdown.
+        """
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning(f"Access log writer is stuck, abandoning {self.queue.qsize()} queued records")
+            return
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            logger.warning(f"Access log writer did not finish within {timeout}s")
+
+    def open(self) -> TextIO:
+        if self.path:
+            return open(self.path, "a", encoding="utf-8", buffering=1 << 16)
+        return sys.stdout
+
+    def run(self) -> None:
+        stream = self.open()
+        try:
+            while True:
+                record = self.queue.get()
+                if record is None:
+                    break
+                lines = [record]
+                # Drain whatever else is queued so a burst costs one flush
+                try:
+                    while len(lines) < 1000:
+                        record = self.queue.get_nowait()
+                        if record is None:
+                            break
+                        lines.append(record)
+                except queue.Empty:
+                    pass
+                stream.write("".join(json.dumps(line, separators=(",", ":")) + "\n" for line in lines))
+                stream.flush()
+                self.written += len(lines)
+                if record is None:
+                    break
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "written": self.written,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+        }
+
+# Global instance, used by RequestLoggingMiddleware
+access_logger = AccessLogger(
+    path=settings.ACCESS_LOG_PATH,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    slow_ms=settings.ACCESS_LOG_SLOW_MS,
+    buffer_size=settings.ACCESS_LOG_BUFFER_SIZE
+)
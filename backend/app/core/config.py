@@ -12,15 +12,80 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./sentinel.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    
+    # SQLite performance profile (applied on every new connection)
+    SQLITE_PROFILE_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE: int = -65536  # negative values are KiB, i.e. 64 MiB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # JWT Token
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-here-change-this-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_ENABLED: bool = True  # Cache decoded claims per token until exp
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_ENABLED: bool = True  # Cache id/telegram_id/is_active per user
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    
+    # Session pruning (expired and logged-out sessions)
+    SESSION_PRUNE_ENABLED: bool = True
+    SESSION_PRUNE_INTERVAL_SECONDS: int = 900
+    SESSION_PRUNE_BATCH_SIZE: int = 500
+    
+    # Bot counter reconciliation (users.bots_count / active_bots_count)
+    BOT_COUNTER_RECONCILE_ENABLED: bool = True
+    BOT_COUNTER_RECONCILE_INTERVAL_SECONDS: int = 3600
+    
+    # Access log (JSON lines, written off the event loop)
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_PATH: str = ""  # Empty writes to stdout
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # Fraction of fast, successful requests logged
+    ACCESS_LOG_SLOW_MS: float = 1000  # Requests at least this slow are always logged
+    ACCESS_LOG_BUFFER_SIZE: int = 10000  # Queued records before new ones are dropped
+    
+    # Metrics (GET /metrics, whitelisted IPs only)
+    METRICS_ENABLED: bool = True
+    
+    # Per-request query counting and N+1 warnings (debug only)
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 5  # Warn when one statement shape runs more often in a request
     
     # Telegram
     TELEGRAM_BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
     TELEGRAM_BOT_USERNAME: str = "Mr_Sakamotobot"
+    TELETHON_PENDING_LOGIN_TTL_SECONDS: int = 600  # Idle code/2FA logins are disconnected after this
+    TELETHON_PENDING_LOGIN_MAX: int = 1000
+    # Uvicorn worker processes (start.sh --workers). With TELETHON_SHARDS=0 every
+    # worker would resume and supervise the same sessions (AUTH_KEY_DUPLICATED,
+    # duplicate promotions), so the app refuses to start when WORKERS > 1 and
+    # TELETHON_SHARDS == 0; run bots in app.services.bot_shards to scale the API.
+    WORKERS: int = 1
+    # Reconnect bots stored as online at startup
+    TELETHON_AUTO_RESUME: bool = True
+    TELETHON_RESUME_CONCURRENCY: int = 50  # Clients connecting at once
+    TELETHON_RESUME_JITTER_SECONDS: float = 2.0  # Random delay before each connect
+    TELETHON_RESUME_BATCH_SIZE: int = 500  # Bots read, and failures written back, per batch
+    # Health checks, reconnects and last_seen/status write-back for running clients
+    TELETHON_SUPERVISOR_ENABLED: bool = True
+    TELETHON_SUPERVISOR_INTERVAL_SECONDS: float = 30
+    TELETHON_RECONNECT_BASE_SECONDS: float = 5  # First backoff delay, doubled per failed attempt
+    TELETHON_RECONNECT_MAX_SECONDS: float = 300
+    TELETHON_RECONNECT_MAX_ATTEMPTS: int = 8  # Then the bot is stopped and marked error
+    TELETHON_RECONNECT_TIMEOUT_SECONDS: float = 30
+    TELETHON_RECONNECT_CONCURRENCY: int = 50
+    # 0 runs clients inside the API process; N routes bots to the N processes of app.services.bot_shards
+    TELETHON_SHARDS: int = 0
+    TELETHON_SHARD_SOCKET_DIR: str = "./shards"
+    TELETHON_SHARD_REQUEST_TIMEOUT_SECONDS: float = 60
+    PROMOTION_WORKERS: int = 32  # Promotion sends in flight at once, across all bots
+    PROMOTION_SEND_SPACING_SECONDS: float = 5  # Gap between one bot's sends to its targets
     
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = [
@@ -32,6 +97,13 @@ class Settings(BaseSettings):
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "sqlite" (shared by all workers)
+    RATE_LIMIT_SQLITE_PATH: str = "./ratelimit.db"
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Tracked clients (memory backend) before idle keys are evicted
+    USER_RATE_LIMIT_PER_MINUTE: int = 120  # Per-user budget when the plan sets none (or no plan)
+    PLAN_QUOTA_CACHE_TTL_SECONDS: int = 300
+    PLAN_QUOTA_CACHE_MAX_SIZE: int = 10000
+    PLANS_CACHE_TTL_SECONDS: int = 300  # Serialized GET /subscriptions/plans body
     
     class Config:
         case_sensitive = True
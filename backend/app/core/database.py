@@ -1,24 +1,122 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import instrument_engine
+from .query_profiler import instrument_query_profiler
 
-# Create SQLite engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return url
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def get_engine_options(url: str) -> dict:
+    """
+    Engine keyword arguments for the given URL
+    In-memory SQLite keeps its single-connection pool, everything else gets a sized pool
+    """
+    options = {}
+    if is_sqlite_url(url):
+        options["connect_args"] = {"check_same_thread": False}  # Needed for SQLite
+        if make_url(url).database in (None, "", ":memory:"):
+            return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+    return options
+
+# insert() constructs that support on_conflict_do_update, by dialect name
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def upsert_insert(dialect_name: str):
+    """
+    Dialect-specific insert() construct that supports on_conflict_do_update
+    Returns None on other dialects, where callers fall back to select-then-insert
+    """
+    return UPSERT_INSERTS.get(dialect_name)
+
+def apply_sqlite_profile(engine: Engine) -> None:
+    """
+    Apply the SQLite performance profile from settings on every new connection
+    WAL lets readers proceed while a writer commits, busy_timeout makes writers
+    wait for the lock instead of failing with "database is locked"
+    """
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def create_database_engine(url: str = settings.DATABASE_URL) -> Engine:
+    """Create a sync engine with pool sizing and the SQLite profile"""
+    engine = create_engine(url, **get_engine_options(url))
+    if is_sqlite_url(url) and settings.SQLITE_PROFILE_ENABLED:
+        apply_sqlite_profile(engine)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine, "sync")
+    if settings.QUERY_PROFILER_ENABLED:
+        instrument_query_profiler(engine)
+    return engine
+
+def create_async_database_engine(url: str = settings.DATABASE_URL) -> AsyncEngine:
+    """Create an asyncio engine with pool sizing and the SQLite profile"""
+    async_url = get_async_database_url(url)
+    options = get_engine_options(async_url)
+    # aiosqlite runs every connection on its own thread already
+    options.pop("connect_args", None)
+    engine = create_async_engine(async_url, **options)
+    if is_sqlite_url(async_url) and settings.SQLITE_PROFILE_ENABLED:
+        apply_sqlite_profile(engine.sync_engine)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine.sync_engine, "async")
+    if settings.QUERY_PROFILER_ENABLED:
+        instrument_query_profiler(engine.sync_engine)
+    return engine
+
+# Create SQLite engine (migrations, scripts and table creation)
+engine = create_database_engine()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine used by the API request path
+async_engine = create_async_database_engine()
+
+# Create AsyncSessionLocal class
+# expire_on_commit is disabled so committed objects can still be serialized
+# without triggering lazy IO outside of an awaited call
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
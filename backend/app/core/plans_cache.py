@@ -0,0 +1,58 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .config import settings
+from .quota_cache import quota_cache
+from ..models.subscription import PricingPlan
+
+class PricingPlansCache:
+    """
+    Serialized GET /subscriptions/plans body and its strong ETag
+    Committed ORM writes to PricingPlan clear it in this process (see below);
+    the TTL bounds staleness for writes made by other processes.
+    """
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entry: Optional[Tuple[float, bytes, str]] = None
+
+    async def get(self, build: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        """Return (body, etag), calling build() to serialize the plans on a miss"""
+        entry = self._entry
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1], entry[2]
+
+        body = await build()
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self._entry = (time.monotonic() + self.ttl_seconds, body, etag)
+        return body, etag
+
+    def invalidate(self) -> None:
+        self._entry = None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+# Shared by the plans endpoint
+plans_cache = PricingPlansCache(ttl_seconds=settings.PLANS_CACHE_TTL_SECONDS)
+
+@event.listens_for(Session, "after_flush")
+def track_plan_writes(session, flush_context) -> None:
+    if any(isinstance(obj, PricingPlan) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["pricing_plans_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def invalidate_plan_caches(session) -> None:
+    # Cleared only once the write is visible, so a concurrent request can't re-cache the old plans
+    if session.info.pop("pricing_plans_changed", False):
+        plans_cache.invalidate()
+        # Plans carry the per-user rate limit budget too
+        quota_cache.clear()
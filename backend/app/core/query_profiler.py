@@ -0,0 +1,49 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryStats:
+    """Statements executed while handling one request"""
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run more than threshold times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+# Stats for the request being handled, set by QueryProfilerMiddleware.
+# SQLAlchemy's asyncio greenlets inherit the caller's context, so the
+# engine listeners below see it too.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def instrument_query_profiler(engine: Engine) -> None:
+    """Count and time every statement executed through engine into current_query_stats"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_profiled_query(connection, cursor, statement, parameters, context, executemany):
+        if current_query_stats.get() is not None:
+            connection.info.setdefault("profiled_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_profiled_query(connection, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        started = connection.info.get("profiled_query_started")
+        if stats is not None and started:
+            stats.record(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def drop_profiled_query(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("profiled_query_started"):
+            connection.info["profiled_query_started"].pop()
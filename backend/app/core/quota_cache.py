@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .config import settings
+from ..models.subscription import PricingPlan, Subscription
+
+class PlanQuotaCache:
+    """
+    Bounded LRU of each user's per-minute request budget with a TTL
+    Subscription writers call invalidate(); the TTL bounds staleness for
+    changes made by other processes.
+    """
+    def __init__(self, ttl_seconds: float = 300, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, quota = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return quota
+
+    def put(self, user_id: int, quota: int) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, quota)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Shared by every per-user rate limiter
+quota_cache = PlanQuotaCache(
+    ttl_seconds=settings.PLAN_QUOTA_CACHE_TTL_SECONDS,
+    max_size=settings.PLAN_QUOTA_CACHE_MAX_SIZE
+)
+
+async def get_user_quota(db: AsyncSession, user_id: int) -> int:
+    """
+    Requests per minute allowed for user_id by its active plan
+    Users without an active subscription, or whose plan sets no limit, get
+    USER_RATE_LIMIT_PER_MINUTE. Only a cache miss reads the database.
+    """
+    quota = quota_cache.get(user_id)
+    if quota is not None:
+        return quota
+
+    quota = await db.scalar(
+        select(PricingPlan.rate_limit_per_minute)
+        .join(Subscription, Subscription.plan_id == PricingPlan.id)
+        .where(Subscription.user_id == user_id, Subscription.status == "active")
+        .limit(1)
+    )
+    quota = quota or settings.USER_RATE_LIMIT_PER_MINUTE
+    quota_cache.put(user_id, quota)
+    return quota
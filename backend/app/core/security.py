@@ -1,14 +1,17 @@
 import hashlib
 import hmac
 import json
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .config import settings
+from .token_cache import TokenCache
 from ..core.database import get_db
 from ..models.user import User
 
@@ -17,9 +20,12 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Decoded JWT claims, shared by every authentication dependency
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -30,35 +36,37 @@ async def get_current_user(
     
     # Mock authentication for testing
     if token == "mocked_token_for_testing":
-        # Create or get test user
-        test_user = db.query(User).filter(User.telegram_id == "123456789").first()
-        if not test_user:
-            test_user = User(
-                telegram_id="123456789",
-                username="testuser",
-                first_name="Test",
-                last_name="User",
-                is_active=True
-            )
-            db.add(test_user)
-            db.commit()
-            db.refresh(test_user)
-        return test_user
+        return await get_test_user(db)
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    payload = verify_token(token)
+    if payload is None:
+        raise credentials_exception
+    user_id: int = payload.get("sub")
+    if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise credentials_exception
     
     return user
 
+async def get_test_user(db: AsyncSession) -> User:
+    """Create or get the user behind the mocked testing token"""
+    test_user = await db.scalar(select(User).where(User.telegram_id == "123456789"))
+    if not test_user:
+        test_user = User(
+            telegram_id="123456789",
+            username="testuser",
+            first_name="Test",
+            last_name="User",
+            is_active=True
+        )
+        db.add(test_user)
+        await db.commit()
+        await db.refresh(test_user)
+    return test_user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -67,17 +75,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
+    # jti keeps tokens issued for the same user within the same second distinct
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", secrets.token_hex(16))
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
-    """Verify JWT token and return payload"""
+    """Verify JWT token and return payload, served from token_cache when possible"""
+    if settings.TOKEN_CACHE_ENABLED:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if token_cache.is_revoked(payload.get("jti")):
+        return None
+    
+    if settings.TOKEN_CACHE_ENABLED:
+        token_cache.put(token, payload)
+    return payload
+
+def revoke_token(token: str) -> None:
+    """
+    Refuse token in this process until it expires
+    Only tokens with a valid signature are recorded, so forged tokens can't
+    grow the revocation set.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return
+    exp, jti = payload.get("exp"), payload.get("jti")
+    if isinstance(exp, (int, float)) and jti:
+        token_cache.revoke(token, jti, float(exp))
 
 def verify_telegram_auth(auth_data: Dict[str, Any]) -> bool:
     """
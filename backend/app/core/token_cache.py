@@ -0,0 +1,86 @@
+import hashlib
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+class TokenCache:
+    """
+    Bounded LRU cache of decoded JWT claims, keyed by a digest of the token
+    Entries live until the token's exp claim. Revocations are remembered by
+    jti until the token's exp and are never evicted by size: only verified
+    tokens can be revoked, so the set is bounded by the tokens actually issued.
+    State is per process.
+    """
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self._revoked_expiry: List[Tuple[float, str]] = []  # min-heap of (exp, jti)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for token, or None on a miss or expiry"""
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """Cache decoded claims until the token expires"""
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return
+        if self.is_revoked(payload.get("jti")):
+            return
+        key = self._digest(token)
+        self._entries[key] = (float(expires_at), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        self._purge_revoked()
+        return jti in self._revoked
+
+    def revoke(self, token: str, jti: str, expires_at: float) -> None:
+        """Evict token's cached claims immediately and refuse its jti until expires_at"""
+        self._entries.pop(self._digest(token), None)
+        if expires_at <= time.time() or jti in self._revoked:
+            return
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._revoked_expiry, (expires_at, jti))
+        self._purge_revoked()
+
+    def _purge_revoked(self) -> None:
+        """Forget revocations whose token has expired anyway"""
+        now = time.time()
+        while self._revoked_expiry and self._revoked_expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._revoked_expiry)
+            self._revoked.pop(jti, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._revoked.clear()
+        self._revoked_expiry.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .config import settings
+from ..models.user import User
+
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    """Compact snapshot of the user fields authentication needs"""
+    id: int
+    telegram_id: str
+    is_active: bool
+
+class UserIdentityCache:
+    """
+    Bounded LRU of UserIdentity snapshots with a TTL
+    Writers that change a user call invalidate() or put(); the TTL bounds
+    staleness for changes made by other processes.
+    """
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[UserIdentity]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, identity = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return identity
+
+    def put(self, identity: UserIdentity) -> None:
+        self._entries[identity.id] = (time.monotonic() + self.ttl_seconds, identity)
+        self._entries.move_to_end(identity.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Shared by every authentication dependency
+user_cache = UserIdentityCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE
+)
+
+def cache_user_identity(user: User) -> UserIdentity:
+    """Refresh the cached snapshot from a freshly written User"""
+    identity = UserIdentity(id=user.id, telegram_id=user.telegram_id, is_active=bool(user.is_active))
+    if settings.USER_CACHE_ENABLED:
+        user_cache.put(identity)
+    return identity
+
+async def get_user_identity(db: AsyncSession, user_id) -> Optional[UserIdentity]:
+    """Resolve a user id to its identity snapshot, reading only three columns on a cache miss"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    if settings.USER_CACHE_ENABLED:
+        identity = user_cache.get(user_id)
+        if identity is not None:
+            return identity
+
+    row = (await db.execute(
+        select(User.id, User.telegram_id, User.is_active).where(User.id == user_id)
+    )).first()
+    if row is None:
+        return None
+
+    identity = UserIdentity(id=row.id, telegram_id=row.telegram_id, is_active=bool(row.is_active))
+    if settings.USER_CACHE_ENABLED:
+        user_cache.put(identity)
+    return identity
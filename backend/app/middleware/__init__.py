@@ -1,6 +1,8 @@
 from fastapi import FastAPI
-from .auth import get_current_user, get_current_active_user, get_optional_current_user
-from .rate_limiter import rate_limit_middleware, auth_rate_limiter, api_rate_limiter
+from .auth import get_current_identity, get_current_user, get_current_active_user, get_optional_current_user
+from .metrics import MetricsMiddleware
+from .query_profiler import QueryProfilerMiddleware
+from .rate_limiter import RateLimitMiddleware, auth_rate_limiter, api_rate_limiter, user_rate_limiter
 from .security import (
     SecurityHeadersMiddleware,
     RequestLoggingMiddleware,
@@ -13,14 +15,26 @@ def setup_middleware(app: FastAPI, settings) -> None:
     """
     Setup all middleware for the application
     """
+    # Per-request query profiler (debug only)
+    if settings.QUERY_PROFILER_ENABLED:
+        app.add_middleware(
+            QueryProfilerMiddleware,
+            repeat_threshold=settings.QUERY_PROFILER_REPEAT_THRESHOLD
+        )
+    
+    # Route latency metrics (added early, so it sits close to the routes)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    
     # Security headers middleware
     app.add_middleware(SecurityHeadersMiddleware)
     
     # Request logging middleware
-    app.add_middleware(RequestLoggingMiddleware)
+    if settings.ACCESS_LOG_ENABLED:
+        app.add_middleware(RequestLoggingMiddleware)
     
     # Rate limiting middleware
-    app.middleware("http")(rate_limit_middleware)
+    app.add_middleware(RateLimitMiddleware)
     
     # CORS middleware
     setup_cors_middleware(app, settings)
@@ -28,7 +42,7 @@ def setup_middleware(app: FastAPI, settings) -> None:
     # Trusted host middleware
     setup_trusted_host_middleware(app)
     
-    # IP whitelist middleware for admin endpoints
+    # IP whitelist middleware for admin and metrics endpoints
     app.add_middleware(
         IPWhitelistMiddleware,
         whitelist=["127.0.0.1", "::1"]  # Add your admin IPs here
@@ -36,9 +50,11 @@ def setup_middleware(app: FastAPI, settings) -> None:
 
 __all__ = [
     "setup_middleware",
+    "get_current_identity",
     "get_current_user",
     "get_current_active_user",
     "get_optional_current_user",
     "auth_rate_limiter",
     "api_rate_limiter",
+    "user_rate_limiter",
 ]
@@ -1,20 +1,23 @@
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from ..core.database import get_db
 from ..core.security import verify_token
+from ..core.user_cache import UserIdentity, get_user_identity, user_cache
 from ..models.user import User
 from ..models.session import Session as UserSession
 
 security = HTTPBearer()
 
-async def get_current_user(
+async def get_current_identity(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> UserIdentity:
     """
-    Get current authenticated user from JWT token
+    Get the authenticated user's identity snapshot from JWT token
+    Served from user_cache; only a cache miss reads the users table
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,31 +25,40 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        # Verify JWT token
-        payload = verify_token(credentials.credentials)
-        if payload is None:
-            raise credentials_exception
-        
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-            
-    except Exception:
+    # Verify JWT token
+    payload = verify_token(credentials.credentials)
+    if payload is None:
         raise credentials_exception
     
-    # Get user from database
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    identity = await get_user_identity(db, payload.get("sub"))
+    if identity is None:
         raise credentials_exception
     
     # Check if user is active
-    if not user.is_active:
+    if not identity.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is disabled"
         )
     
+    return identity
+
+async def get_current_user(
+    identity: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Get current authenticated user, for routes that need the full row
+    """
+    user = await db.get(User, identity.id)
+    if user is None:
+        user_cache.invalidate(identity.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
 
 async def get_current_active_user(
@@ -64,7 +76,7 @@ async def get_current_active_user(
 
 async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """
     Get current user if token is provided, otherwise return None
@@ -82,7 +94,7 @@ async def get_optional_current_user(
         if user_id is None:
             return None
             
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.scalar(select(User).where(User.id == int(user_id)))
         if user is None or not user.is_active:
             return None
             
@@ -90,19 +102,19 @@ async def get_optional_current_user(
     except Exception:
         return None
 
-def verify_user_session(
+async def verify_user_session(
     token: str,
     user_id: int,
-    db: Session
+    db: AsyncSession
 ) -> bool:
     """
     Verify that the session token is valid for the user
     """
-    session = db.query(UserSession).filter(
-        UserSession.token == token,
+    session = await db.scalar(select(UserSession).where(
+        UserSession.token_hash == UserSession.hash_token(token),
         UserSession.user_id == user_id,
         UserSession.is_active == True
-    ).first()
+    ))
     
     if session is None:
         return False
@@ -0,0 +1,42 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+from ..core.query_profiler import QueryStats, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+class QueryProfilerMiddleware:
+    """
+    Debug instrumentation: count and time the statements each request runs
+    Totals are added as X-DB-Query-Count and X-DB-Query-Time (milliseconds)
+    response headers, and a warning is logged for every statement shape the
+    request ran more than repeat_threshold times (usually an N+1 pattern).
+    Only installed when QUERY_PROFILER_ENABLED is set.
+    """
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 5):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_totals(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Query-Time"] = f"{stats.duration * 1000:.3f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_totals)
+        finally:
+            current_query_stats.reset(token)
+            for shape, count in stats.repeated(self.repeat_threshold):
+                logger.warning(
+                    f"Possible N+1: {scope['method']} {scope['path']} ran {count} times: {' '.join(shape.split())}"
+                )
@@ -0,0 +1,162 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """
+    Per-process GCRA state: one TAT float per key in a bounded dict
+    A key whose TAT is in the past is indistinguishable from an unknown key, so
+    idle keys are swept every sweep_interval seconds and whenever the table
+    reaches max_keys. If every key is still active the oldest are evicted.
+    """
+    blocking = False  # Cheap enough to call on the event loop
+    
+    def __init__(self, max_keys: int = None, sweep_interval: float = 60):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self.sweep_interval = sweep_interval
+        self.tats: Dict[str, float] = {}
+        self.next_sweep = 0.0
+    
+    def update(self, key: str, emission_interval: float, window_seconds: float,
+               now: float) -> Tuple[bool, float, float]:
+        """
+        Apply one request to key's TAT and return (allowed, tat, new_tat)
+        """
+        tat = self.tats.get(key)
+        if tat is None:
+            if now >= self.next_sweep or len(self.tats) >= self.max_keys:
+                self.sweep(now)
+            tat = now
+        elif tat < now:
+            tat = now
+        
+        new_tat = tat + emission_interval
+        if now < new_tat - window_seconds:
+            return False, tat, new_tat
+        
+        self.tats[key] = new_tat
+        return True, tat, new_tat
+    
+    def get_tat(self, key: str) -> Optional[float]:
+        return self.tats.get(key)
+    
+    def sweep(self, now: float) -> int:
+        """
+        Drop idle keys, then the oldest keys if the table is still full
+        Returns the number of keys removed.
+        """
+        before = len(self.tats)
+        self.tats = {key: tat for key, tat in self.tats.items() if tat > now}
+        if len(self.tats) >= self.max_keys:
+            # Keep the most recently inserted 3/4 so eviction isn't repeated on every new key
+            keep = self.max_keys * 3 // 4
+            self.tats = dict(list(self.tats.items())[-keep:])
+        self.next_sweep = now + self.sweep_interval
+        return before - len(self.tats)
+    
+    def __len__(self) -> int:
+        return len(self.tats)
+
+class SQLiteBackend:
+    """
+    GCRA state in a SQLite file shared by every worker process on the host
+    Each decision is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    statement, so concurrent workers can't both take the last slot. The file
+    only holds throwaway counters: it runs with synchronous=OFF and is not
+    the application database. Calls block on the file lock for up to
+    busy_timeout seconds, so RateLimiter runs them in a worker thread, and a
+    decision that still can't get the lock fails open.
+    """
+    blocking = True
+    
+    def __init__(self, path: str = None, sweep_interval: float = 60, busy_timeout: float = 5):
+        self.path = path or settings.RATE_LIMIT_SQLITE_PATH
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self.next_sweep = 0.0
+        self.local = threading.local()
+    
+    def connection(self) -> sqlite3.Connection:
+        """Connection for this process and thread, opened after any fork"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout)
+            self.initialize(connection)
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+    
+    @staticmethod
+    def initialize(connection: sqlite3.Connection) -> None:
+        """
+        Switch to WAL and create the table
+        Changing the journal mode doesn't wait on the busy timeout, so workers
+        starting together retry until the first one has set it up.
+        """
+        for attempt in range(50):
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+                )
+                break
+            except sqlite3.OperationalError:
+                if attempt == 49:
+                    raise
+                time.sleep(0.1)
+        connection.execute("PRAGMA synchronous=OFF")
+    
+    def update(self, key: str, emission_interval: float, window_seconds: float,
+               now: float) -> Tuple[bool, float, float]:
+        """
+        Apply one request to key's TAT and return (allowed, tat, new_tat)
+        """
+        try:
+            connection = self.connection()
+            if now >= self.next_sweep:
+                self.sweep(now)
+            
+            row = connection.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+                "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+                "WHERE max(tat, :now) + :interval - :window <= :now "
+                "RETURNING tat",
+                {"key": key, "now": now, "interval": emission_interval, "window": window_seconds}
+            ).fetchone()
+            if row is not None:
+                return True, row[0] - emission_interval, row[0]
+            
+            # Denied: the row was left untouched, read it back for the headers
+            tat = max(self.get_tat(key) or now, now)
+            return False, tat, tat + emission_interval
+        except sqlite3.OperationalError as e:
+            # A locked or broken counter file must not turn into 500s: fail open
+            logger.warning(f"Rate limit store unavailable, allowing request: {str(e)}")
+            return True, now, now
+    
+    def get_tat(self, key: str) -> Optional[float]:
+        row = self.connection().execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def sweep(self, now: float) -> int:
+        """Delete idle keys, returns the number removed"""
+        self.next_sweep = now + self.sweep_interval
+        return self.connection().execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+    
+    def __len__(self) -> int:
+        return self.connection().execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+
+def create_rate_limit_backend(name: str = None):
+    """Build the backend selected by RATE_LIMIT_BACKEND ("memory" or "sqlite")"""
+    name = name or settings.RATE_LIMIT_BACKEND
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
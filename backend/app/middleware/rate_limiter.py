@@ -1,91 +1,221 @@
-from fastapi import HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
+from dataclasses import dataclass
 from typing import Dict, Optional
+import math
 import time
-from collections import defaultdict, deque
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from ..core.config import settings
+from ..core.database import get_db
+from ..core.metrics import rate_limit_rejections
+from ..core.quota_cache import get_user_quota
+from ..core.user_cache import UserIdentity
+from .auth import get_current_identity
+from .rate_limit_backends import create_rate_limit_backend
+
+@dataclass(frozen=True, slots=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the bucket is full again
+    retry_after: float  # seconds until the next request is allowed, 0 if allowed
+    
+    def headers(self) -> Dict[str, str]:
+        """Standard X-RateLimit-* headers (plus Retry-After when limited)"""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
 
 class RateLimiter:
-    def __init__(self, max_requests: int = None, window_seconds: int = 60):
+    """
+    GCRA (generic cell rate algorithm) limiter: max_requests per window_seconds
+    with bursts of up to max_requests
+    State lives in a backend (see rate_limit_backends), shared by every limiter
+    and namespaced by name. The memory backend is per process; the SQLite one
+    is shared by all workers on the host.
+    """
+    def __init__(self, max_requests: int = None, window_seconds: int = 60,
+                 name: str = None, backend=None):
         self.max_requests = max_requests or settings.RATE_LIMIT_PER_MINUTE
         self.window_seconds = window_seconds
-        self.requests: Dict[str, deque] = defaultdict(deque)
+        self.emission_interval = window_seconds / self.max_requests
+        self.name = name or f"{self.max_requests}/{window_seconds}"
+        self.backend = backend if backend is not None else rate_limit_backend
+    
+    def consume(self, identifier: str, now: float) -> tuple:
+        """
+        Apply one request to identifier and return (allowed, tat, new_tat)
+        """
+        return self.backend.update(
+            f"{self.name}:{identifier}", self.emission_interval, self.window_seconds, now
+        )
+    
+    def hit(self, identifier: str) -> RateLimitResult:
+        """
+        Count one request for identifier and return the decision with header values
+        """
+        now = time.time()
+        allowed, tat, new_tat = self.consume(identifier, now)
+        allow_at = new_tat - self.window_seconds
+        if not allowed:
+            return RateLimitResult(
+                allowed=False,
+                limit=self.max_requests,
+                remaining=0,
+                reset_after=tat - now,
+                retry_after=allow_at - now
+            )
+        return RateLimitResult(
+            allowed=True,
+            limit=self.max_requests,
+            remaining=int((now - allow_at) / self.emission_interval),
+            reset_after=new_tat - now,
+            retry_after=0.0
+        )
+    
+    async def hit_async(self, identifier: str) -> RateLimitResult:
+        """
+        hit() for request handlers: blocking backends run in a worker thread
+        Rejections are counted here, back on the event loop, since the
+        metrics counters take no lock.
+        """
+        if self.backend.blocking:
+            result = await to_thread.run_sync(self.hit, identifier)
+        else:
+            result = self.hit(identifier)
+        if not result.allowed:
+            rate_limit_rejections.inc(self.name)
+        return result
     
     def is_allowed(self, identifier: str) -> bool:
         """
         Check if request is allowed based on rate limiting
         """
-        now = time.time()
-        window_start = now - self.window_seconds
-        
-        # Clean old requests outside the window
-        while self.requests[identifier] and self.requests[identifier][0] < window_start:
-            self.requests[identifier].popleft()
-        
-        # Check if under limit
-        if len(self.requests[identifier]) < self.max_requests:
-            self.requests[identifier].append(now)
-            return True
-        
-        return False
+        return self.consume(identifier, time.time())[0]
     
     def get_reset_time(self, identifier: str) -> Optional[float]:
         """
         Get the time when the rate limit will reset for this identifier
         """
-        if not self.requests[identifier]:
+        tat = self.backend.get_tat(f"{self.name}:{identifier}")
+        if tat is None:
             return None
-        
-        return self.requests[identifier][0] + self.window_seconds
+        return max(tat, time.time())
+
+# Shared state for every limiter in this process, selected by RATE_LIMIT_BACKEND
+rate_limit_backend = create_rate_limit_backend()
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(name="global")
 
-async def rate_limit_middleware(request: Request, call_next):
+class RateLimitMiddleware:
     """
-    Rate limiting middleware
+    Rate limiting middleware, keyed on the client IP
+    Pure ASGI: limited requests are answered here, allowed ones get the
+    X-RateLimit-* headers added on http.response.start.
     """
-    # Get client identifier (IP address)
-    client_ip = request.client.host
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
     
-    # Check if request is allowed
-    if not rate_limiter.is_allowed(client_ip):
-        reset_time = rate_limiter.get_reset_time(client_ip)
-        retry_after = int(reset_time - time.time()) if reset_time else 60
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        return JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={
-                "detail": "Rate limit exceeded",
-                "retry_after": retry_after
-            },
-            headers={"Retry-After": str(retry_after)}
-        )
-    
-    response = await call_next(request)
-    return response
+        # Get client identifier (IP address)
+        client = scope.get("client")
+        client_ip = client[0] if client else ""
+        
+        # Check if request is allowed
+        result = await self.limiter.hit_async(client_ip)
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "detail": "Rate limit exceeded",
+                    "retry_after": math.ceil(result.retry_after)
+                },
+                headers=result.headers()
+            )
+            await response(scope, receive, send)
+            return
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Endpoint limiters are usually tighter, so headers they already set win
+                headers = MutableHeaders(scope=message)
+                for name, value in result.headers().items():
+                    headers.setdefault(name, value)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
 
-def create_rate_limiter(max_requests: int, window_seconds: int = 60):
+def create_rate_limiter(max_requests: int, window_seconds: int = 60, name: str = None):
     """
     Create a custom rate limiter for specific endpoints
     """
-    limiter = RateLimiter(max_requests, window_seconds)
+    limiter = RateLimiter(max_requests, window_seconds, name=name)
     
-    async def rate_limit_dependency(request: Request):
+    async def rate_limit_dependency(request: Request, response: Response):
         client_ip = request.client.host
         
-        if not limiter.is_allowed(client_ip):
-            reset_time = limiter.get_reset_time(client_ip)
-            retry_after = int(reset_time - time.time()) if reset_time else window_seconds
-            
+        result = await limiter.hit_async(client_ip)
+        if not result.allowed:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Rate limit exceeded",
-                headers={"Retry-After": str(retry_after)}
+                headers=result.headers()
             )
+        response.headers.update(result.headers())
     
+    rate_limit_dependency.limiter = limiter
     return rate_limit_dependency
 
+def create_user_rate_limiter(window_seconds: int = 60, name: str = "user"):
+    """
+    Create a limiter for authenticated endpoints keyed on the user id
+    The budget is the user's plan rate_limit_per_minute, scaled to
+    window_seconds. Identity and quota both come from caches, so a warm
+    request makes no database query here.
+    """
+    limiters: Dict[int, RateLimiter] = {}
+    
+    async def user_rate_limit_dependency(
+        response: Response,
+        current_user: UserIdentity = Depends(get_current_identity),
+        db: AsyncSession = Depends(get_db)
+    ):
+        quota = await get_user_quota(db, current_user.id)
+        limiter = limiters.get(quota)
+        if limiter is None:
+            # One limiter per distinct budget, all sharing the same key space so
+            # a plan change carries the user's current TAT over
+            limiter = RateLimiter(max(1, quota * window_seconds // 60), window_seconds, name=name)
+            limiters[quota] = limiter
+        
+        result = await limiter.hit_async(str(current_user.id))
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=result.headers()
+            )
+        response.headers.update(result.headers())
+    
+    user_rate_limit_dependency.limiters = limiters
+    return user_rate_limit_dependency
+
 # Specific rate limiters for different endpoints
-auth_rate_limiter = create_rate_limiter(max_requests=5, window_seconds=300)  # 5 requests per 5 minutes
-api_rate_limiter = create_rate_limiter(max_requests=100, window_seconds=60)  # 100 requests per minute
+auth_rate_limiter = create_rate_limiter(max_requests=5, window_seconds=300, name="auth")  # 5 requests per 5 minutes
+api_rate_limiter = create_rate_limiter(max_requests=100, window_seconds=60, name="api")  # 100 requests per minute
+user_rate_limiter = create_user_rate_limiter()  # Plan budget per authenticated user
@@ -1,58 +1,93 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
+from ..core.access_log import AccessLogger, access_logger
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+def client_host(scope: Scope) -> str:
+    """Client address from the ASGI scope (empty when the server doesn't report one)"""
+    client = scope.get("client")
+    return client[0] if client else ""
+
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
+    Pure ASGI: headers are set on http.response.start, the body is untouched
     """
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+    headers = (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+    )
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Remove server header for security
-        if "server" in response.headers:
-            del response.headers["server"]
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self.headers:
+                    headers[name] = value
+                
+                # Remove server header for security
+                if "server" in headers:
+                    del headers["server"]
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
     Log all requests for security monitoring
+    Records go to access_logger, which samples and writes them off the event
+    loop; the URL and headers are only decoded for requests that are kept.
     """
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request details
-        client_ip = request.client.host
-        method = request.method
-        url = str(request.url)
-        user_agent = request.headers.get("user-agent", "")
-        
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response details
-        status_code = response.status_code
+    def __init__(self, app: ASGIApp, logger: AccessLogger = None):
+        self.app = app
+        self.logger = logger or access_logger
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # You can integrate with your logging system here
-        print(f"{client_ip} - {method} {url} - {status_code} - {process_time:.3f}s - {user_agent}")
+        start_time = time.time()
+        started = time.perf_counter()
+        status_code = 500
         
-        # Add processing time header
-        response.headers["X-Process-Time"] = str(process_time)
+        async def send_logged(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add processing time header
+                MutableHeaders(scope=message)["X-Process-Time"] = str(time.perf_counter() - started)
+            await send(message)
         
-        return response
+        try:
+            await self.app(scope, receive, send_logged)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if self.logger.should_log(status_code, duration_ms):
+                self.logger.log({
+                    "ts": start_time,
+                    "client": client_host(scope),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope["query_string"].decode("latin-1"),
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 3),
+                    "user_agent": Headers(scope=scope).get("user-agent", ""),
+                })
 
 def setup_cors_middleware(app, settings):
     """
@@ -79,24 +114,21 @@ def setup_trusted_host_middleware(app, allowed_hosts=None):
         allowed_hosts=allowed_hosts
     )
 
-class IPWhitelistMiddleware(BaseHTTPMiddleware):
+class IPWhitelistMiddleware:
     """
-    IP whitelist middleware for admin endpoints
+    IP whitelist middleware for admin and metrics endpoints
     """
-    def __init__(self, app, whitelist: list = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, whitelist: list = None, protected_paths: tuple = ("/admin", "/metrics")):
+        self.app = app
         self.whitelist = whitelist or ["127.0.0.1", "::1"]  # localhost by default
+        self.protected_paths = tuple(protected_paths)
     
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        
-        # Check if accessing admin endpoints
-        if request.url.path.startswith("/admin"):
-            if client_ip not in self.whitelist:
-                return Response(
-                    content="Access denied",
-                    status_code=403
-                )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Check if accessing protected endpoints
+        if (scope["type"] == "http" and scope["path"].startswith(self.protected_paths)
+                and client_host(scope) not in self.whitelist):
+            response = Response(content="Access denied", status_code=403)
+            await response(scope, receive, send)
+            return
         
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
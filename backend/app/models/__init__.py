@@ -1,7 +1,8 @@
 from .user import User
-from .bot import Bot
 from .subscription import PricingPlan, Subscription, Payment
 from .session import Session
+# Imported last: its load profiles configure the mappers, so every model must be registered
+from .bot import Bot
 
 __all__ = [
     "User",
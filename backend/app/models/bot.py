@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, JSON
-from sqlalchemy.orm import relationship
+from collections import defaultdict
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, JSON, Index, event, inspect
+from sqlalchemy.orm import Session, relationship, deferred, load_only, undefer, undefer_group
 from datetime import datetime
 from ..core.database import Base
+from .user import User
 
 class Bot(Base):
     __tablename__ = "bots"
+    __table_args__ = (
+        # Owner-scoped keyset pages, with and without a status filter;
+        # their prefixes also serve the profile counters
+        Index("ix_bots_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_bots_user_id_status_created_at", "user_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,7 +23,8 @@ class Bot(Base):
     phone_number = Column(String, unique=True)
     api_id = Column(String)
     api_hash = Column(String)
-    session_string = Column(Text)  # Store Telethon session string
+    # Credentials are deferred and raise if touched without an explicit load profile
+    session_string = deferred(Column(Text), group="credentials", raiseload=True)  # Store Telethon session string
     
     # Proxy Configuration
     proxy_enabled = Column(Boolean, default=False)
@@ -23,7 +32,7 @@ class Bot(Base):
     proxy_host = Column(String)
     proxy_port = Column(Integer)
     proxy_username = Column(String, nullable=True)
-    proxy_password = Column(String, nullable=True)
+    proxy_password = deferred(Column(String, nullable=True), group="credentials", raiseload=True)
     
     # Promotion Settings
     promotion_settings = Column(JSON, default={
@@ -36,6 +45,9 @@ class Bot(Base):
     # Bot Status
     uptime = Column(String)  # e.g., "2 days", "5 hours"
     last_activity = Column(String)  # e.g., "2 minutes ago"
+    # Written by the TelethonService supervisor; API responses derive uptime/last_activity from them
+    started_at = Column(DateTime)  # When the current connection was established
+    last_seen = Column(DateTime)  # Last time the supervisor found the client connected
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -44,3 +56,58 @@ class Bot(Base):
 
     def __repr__(self):
         return f"<Bot {self.name}>"
+
+# Column load profiles for the different read paths, used as select(Bot).options(*PROFILE)
+# Without options a Bot loads every column except the deferred credentials (detail profile)
+# List: only what BotSummary serializes
+BOT_LIST_LOAD = (
+    load_only(
+        Bot.id, Bot.user_id, Bot.name, Bot.status, Bot.phone_number, Bot.proxy_enabled,
+        Bot.uptime, Bot.last_activity, Bot.started_at, Bot.last_seen, Bot.created_at, Bot.updated_at,
+        raiseload=True
+    ),
+)
+# Login flow: proxy credentials are needed to reach Telegram, the session is not
+BOT_AUTH_LOAD = (undefer(Bot.proxy_password),)
+# Runtime: everything TelethonService.start_bot needs to connect
+BOT_RUNTIME_LOAD = (undefer_group("credentials"),)
+
+def previous_status(bot: Bot):
+    """Status as last flushed, before any pending change"""
+    history = inspect(bot).attrs.status.history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+@event.listens_for(Session, "after_flush")
+def update_bot_counters(session, flush_context) -> None:
+    """
+    Keep users.bots_count and users.active_bots_count in step with ORM bot writes
+    The UPDATE runs on the flush's connection, so it commits or rolls back
+    with the bot rows. Core bulk statements bypass this; the reconciler in
+    services/bot_counters.py repairs any drift they leave.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if isinstance(obj, Bot):
+            deltas[obj.user_id][0] += 1
+            deltas[obj.user_id][1] += obj.status == "online"
+    for obj in session.deleted:
+        if isinstance(obj, Bot):
+            deltas[obj.user_id][0] -= 1
+            deltas[obj.user_id][1] -= previous_status(obj) == "online"
+    for obj in session.dirty:
+        if isinstance(obj, Bot) and inspect(obj).attrs.status.history.has_changes():
+            deltas[obj.user_id][1] += (obj.status == "online") - (previous_status(obj) == "online")
+
+    users = User.__table__
+    for user_id, (bots, active_bots) in deltas.items():
+        if bots or active_bots:
+            session.connection().execute(
+                users.update()
+                .where(users.c.id == user_id)
+                .values(
+                    bots_count=users.c.bots_count + bots,
+                    active_bots_count=users.c.active_bots_count + active_bots
+                )
+            )
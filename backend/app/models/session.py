@@ -1,14 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+import hashlib
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Live sessions per owner, also serves account deletion by user_id
+        Index("ix_sessions_user_id_is_active", "user_id", "is_active"),
+        # Pruning picks expired or logged-out rows without scanning the table
+        Index("ix_sessions_expires_at", "expires_at"),
+        Index("ix_sessions_is_active", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String, unique=True, index=True, nullable=False)
+    token_hash = Column(String(32), unique=True, index=True, nullable=False)  # hash_token() of the JWT
     is_active = Column(Boolean, default=True)
     user_agent = Column(String)  # Store client browser/app info
     ip_address = Column(String)  # Store client IP for security
@@ -23,6 +31,11 @@ class Session(Base):
     def __repr__(self):
         return f"<Session {self.user_id}>"
 
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """Fixed-width lookup key for a JWT, the token itself is never stored"""
+        return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
     def is_valid(self) -> bool:
         """Check if session is valid and not expired"""
         return (
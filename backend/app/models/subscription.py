@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
@@ -12,6 +12,7 @@ class PricingPlan(Base):
     currency = Column(String, default="USD")
     billing_cycle = Column(String, default="monthly")  # monthly, yearly
     max_bots = Column(Integer, default=1)  # Maximum number of bots allowed
+    rate_limit_per_minute = Column(Integer)  # Per-user API budget, NULL uses USER_RATE_LIMIT_PER_MINUTE
     features = Column(JSON)  # List of features as JSON array
     is_active = Column(Boolean, default=True)
     highlight = Column(Boolean, default=False)  # For highlighting popular plans
@@ -27,6 +28,10 @@ class PricingPlan(Base):
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Active subscription lookup and user-scoped payment history joins
+        Index("ix_subscriptions_user_id_status", "user_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -49,9 +54,16 @@ class Subscription(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Payment history per subscription, newest first
+        Index("ix_payments_subscription_id_created_at", "subscription_id", "created_at"),
+        # Keyset pages of a user's payment history across all subscriptions
+        Index("ix_payments_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", name="fk_payments_user_id_users"))  # Copied from the subscription for history pages
     amount = Column(Float, nullable=False)
     currency = Column(String, default="USD")
     status = Column(String, default="pending")  # pending, completed, failed, refunded
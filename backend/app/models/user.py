@@ -13,6 +13,9 @@ class User(Base):
     last_name = Column(String)
     photo_url = Column(String)
     is_active = Column(Boolean, default=True)
+    # Maintained on every ORM bot write (see models/bot.py), repaired by services/bot_counters.py
+    bots_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_bots_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -17,6 +17,7 @@ from .bot import (
     BotCreate,
     BotUpdate,
     BotResponse,
+    BotSummary,
     BotStatusUpdate,
     BotWithToken,
     BotList,
@@ -35,10 +36,15 @@ from .subscription import (
     PaymentCreate,
     PaymentUpdate,
     PaymentResponse,
+    PaymentList,
     SubscribeRequest,
     SubscriptionWithPayments,
     PricingPlansResponse
 )
+from .dashboard import (
+    PaymentSummary,
+    DashboardResponse
+)
 
 __all__ = [
     # Auth schemas
@@ -60,6 +66,7 @@ __all__ = [
     "BotCreate",
     "BotUpdate",
     "BotResponse",
+    "BotSummary",
     "BotStatusUpdate",
     "BotWithToken",
     "BotList",
@@ -78,7 +85,12 @@ __all__ = [
     "PaymentCreate",
     "PaymentUpdate",
     "PaymentResponse",
+    "PaymentList",
     "SubscribeRequest",
     "SubscriptionWithPayments",
-    "PricingPlansResponse"
+    "PricingPlansResponse",
+    
+    # Dashboard schemas
+    "PaymentSummary",
+    "DashboardResponse"
 ]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 from .base import BaseSchema, TimestampMixin, IDMixin
@@ -43,7 +43,30 @@ class BotUpdate(BaseModel):
     uptime: Optional[str] = None
     last_activity: Optional[str] = None
 
-class BotResponse(BotBase, IDMixin, TimestampMixin):
+def format_duration(seconds: float) -> str:
+    """Largest whole unit of a duration, e.g. 2 days, 5 hours or 1 minute"""
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    count = max(0, int(seconds))
+    return f"{count} second{'s' if count != 1 else ''}"
+
+class BotRuntimeMixin(BaseModel):
+    started_at: Optional[datetime] = Field(None, description="When the current connection was established")
+    last_seen: Optional[datetime] = Field(None, description="Last time the client was seen connected")
+    
+    @model_validator(mode="after")
+    def derive_activity(self):
+        """Fill uptime and last_activity from the supervisor's timestamps when it has them"""
+        now = datetime.utcnow()
+        if self.started_at is not None:
+            self.uptime = format_duration((now - self.started_at).total_seconds()) if self.status == "online" else None
+        if self.last_seen is not None:
+            self.last_activity = f"{format_duration((now - self.last_seen).total_seconds())} ago"
+        return self
+
+class BotResponse(BotBase, BotRuntimeMixin, IDMixin, TimestampMixin):
     user_id: int = Field(..., description="Owner user ID")
     phone_number: Optional[str] = None
     api_id: Optional[str] = None
@@ -55,6 +78,11 @@ class BotResponse(BotBase, IDMixin, TimestampMixin):
     proxy_username: Optional[str] = None
     promotion_settings: Optional[Dict[str, Any]] = None
 
+class BotSummary(BotBase, BotRuntimeMixin, IDMixin, TimestampMixin):
+    user_id: int = Field(..., description="Owner user ID")
+    phone_number: Optional[str] = None
+    proxy_enabled: bool = False
+
 class BotStatusUpdate(BaseModel):
     status: str = Field(..., description="New bot status")
     uptime: Optional[str] = None
@@ -64,8 +92,9 @@ class BotWithToken(BotResponse):
     token: str = Field(..., description="Bot token (encrypted)")
 
 class BotList(BaseModel):
-    total: int
-    items: list[BotResponse]
+    total: Optional[int] = Field(None, description="Total matching bots, only when include_total is set")
+    items: list[BotSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
 
 # Export all models
 __all__ = [
@@ -76,6 +105,7 @@ __all__ = [
     "BotCreate",
     "BotUpdate",
     "BotResponse",
+    "BotSummary",
     "BotStatusUpdate",
     "BotWithToken",
     "BotList"
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+from .user import UserProfile
+from .bot import BotList
+
+class PaymentSummary(BaseModel):
+    count: int = Field(0, description="Payments made by the user")
+    total_amount: float = Field(0, description="Sum of all payment amounts")
+    last_payment_at: Optional[datetime] = Field(None, description="When the latest payment was created")
+
+class DashboardResponse(BaseModel):
+    user: UserProfile
+    bots: BotList
+    payments: PaymentSummary
+    live: Optional[Dict[int, Dict[str, Any]]] = Field(
+        None, description="Live Telegram state per bot id on this page, only when live is set"
+    )
@@ -9,6 +9,7 @@ class PricingPlanBase(BaseModel):
     currency: str = Field(default="USD", description="Currency code")
     billing_cycle: str = Field(default="monthly", description="Billing cycle")
     max_bots: int = Field(default=1, ge=1, description="Maximum bots allowed")
+    rate_limit_per_minute: Optional[int] = Field(None, ge=1, description="API requests per minute per user")
     features: List[str] = Field(default=[], description="Plan features")
     highlight: bool = Field(default=False, description="Highlight this plan")
     cta_text: str = Field(default="Get Started", description="Call to action text")
@@ -22,6 +23,7 @@ class PricingPlanUpdate(BaseModel):
     currency: Optional[str] = None
     billing_cycle: Optional[str] = None
     max_bots: Optional[int] = Field(None, ge=1)
+    rate_limit_per_minute: Optional[int] = Field(None, ge=1)
     features: Optional[List[str]] = None
     highlight: Optional[bool] = None
     cta_text: Optional[str] = None
@@ -69,6 +71,13 @@ class PaymentResponse(BaseSchema, IDMixin, PaymentBase, TimestampMixin):
     subscription_id: int
     status: str
     payment_date: datetime
+    # The ORM column is payment_metadata, Payment.metadata is the table MetaData
+    metadata: Optional[dict] = Field(default={}, validation_alias="payment_metadata")
+
+class PaymentList(BaseModel):
+    total: Optional[int] = Field(None, description="Total payments, only when include_total is set")
+    items: List[PaymentResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
 
 class SubscribeRequest(BaseModel):
     plan_id: int = Field(..., description="Plan ID to subscribe to")
@@ -81,3 +90,4 @@ class SubscriptionWithPayments(SubscriptionResponse):
 class PricingPlansResponse(BaseModel):
     plans: List[PricingPlanResponse]
     total: int
+
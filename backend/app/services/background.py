@@ -0,0 +1,62 @@
+"""
+Background task scaffolding for Sentinel Ubot Backend
+
+Services that run beside the API (session pruning, counter reconciliation,
+fleet resume, bot supervision) own one asyncio task each, started and
+stopped from the application lifespan.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+class BackgroundTask(ABC):
+    """One asyncio task running run(); start() is idempotent and stop() cancels and awaits it"""
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    @abstractmethod
+    async def run(self) -> None:
+        """Body of the task, cancelled by stop()"""
+
+class PeriodicTask(BackgroundTask):
+    """
+    Calls tick() every interval_seconds until stopped
+    A failing tick is logged with failure_message through the subclass's
+    module logger and retried on the next interval.
+    """
+    failure_message = "Periodic task failed"
+
+    def __init__(self, interval_seconds: float):
+        super().__init__()
+        self.interval_seconds = interval_seconds
+
+    async def run(self) -> None:
+        logger = logging.getLogger(type(self).__module__)
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.failure_message}: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    @abstractmethod
+    async def tick(self) -> None:
+        """One round of the periodic work"""
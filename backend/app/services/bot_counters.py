@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Bot counter reconciliation for Sentinel Ubot Backend
+
+users.bots_count and users.active_bots_count are maintained on every ORM bot
+write; this recomputes them from the bots table and fixes the rows that
+drifted (bulk deletes, manual edits). Runs as a background task from the
+application lifespan, or once from the command line:
+python -m app.services.bot_counters
+"""
+
+import asyncio
+import logging
+from sqlalchemy import and_, func, or_, select, update
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, async_engine
+from ..models.bot import Bot
+from ..models.user import User
+from .background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+async def reconcile_bot_counters() -> int:
+    """
+    Recompute both counters for every user whose stored values are wrong
+    Returns the number of users repaired.
+    """
+    bots_count = (
+        select(func.count()).select_from(Bot).where(Bot.user_id == User.id).scalar_subquery()
+    )
+    active_bots_count = (
+        select(func.count()).select_from(Bot)
+        .where(and_(Bot.user_id == User.id, Bot.status == "online"))
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(User)
+            .where(or_(User.bots_count != bots_count, User.active_bots_count != active_bots_count))
+            .values(bots_count=bots_count, active_bots_count=active_bots_count)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return result.rowcount
+
+class BotCounterReconciler(PeriodicTask):
+    """Periodically repairs the denormalized bot counters while the application runs"""
+    failure_message = "Bot counter reconciliation failed"
+
+    def __init__(self, interval_seconds: float):
+        super().__init__(interval_seconds)
+        self.last_repaired = 0
+
+    async def tick(self) -> None:
+        self.last_repaired = await reconcile_bot_counters()
+        if self.last_repaired:
+            logger.warning(f"Repaired bot counters for {self.last_repaired} users")
+
+# Global instance
+bot_counter_reconciler = BotCounterReconciler(
+    interval_seconds=settings.BOT_COUNTER_RECONCILE_INTERVAL_SECONDS
+)
+
+async def run_once() -> int:
+    try:
+        return await reconcile_bot_counters()
+    finally:
+        await async_engine.dispose()
+
+def main():
+    repaired = asyncio.run(run_once())
+    print(f"✅ Repaired bot counters for {repaired} users")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Sharded userbot runtime for Sentinel Ubot Backend
+
+With TELETHON_SHARDS > 0 the Telethon clients don't run inside the API
+process. Bots are assigned to TELETHON_SHARDS worker processes by rendezvous
+hashing of their id; every worker has its own event loop, its own
+telethon_service (active_clients, promotion scheduler, supervisor) and resumes
+only its own bots at startup. The API talks to the workers over one Unix
+socket per shard with length-prefixed JSON requests (start, stop, send, info,
+promote, running, status), multiplexed by request id.
+
+Start the workers next to the API server, with the same TELETHON_SHARDS:
+python -m app.services.bot_shards [--shards 4]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import struct
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, async_engine
+from ..models.bot import Bot, BOT_RUNTIME_LOAD
+from .fleet_resume import FleetResumer
+from .telethon_service import TelethonService, telethon_service
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+class ShardError(Exception):
+    """A shard could not be reached or failed to handle a request"""
+
+def shard_for(bot_id: int, shard_count: int) -> int:
+    """Rendezvous hashing: going from N to N+1 shards moves only ~1/(N+1) of the bots"""
+    return max(
+        range(shard_count),
+        key=lambda shard: hashlib.blake2b(f"{shard}:{bot_id}".encode(), digest_size=8).digest()
+    )
+
+def shard_socket_path(index: int) -> str:
+    return os.path.join(settings.TELETHON_SHARD_SOCKET_DIR, f"shard-{index}.sock")
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    """Next framed message, or None once the peer has closed the connection"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ShardError(f"Message of {size} bytes exceeds the limit")
+    return json.loads(await reader.readexactly(size))
+
+async def write_message(writer: asyncio.StreamWriter, message: dict) -> None:
+    payload = json.dumps(message, default=str).encode()
+    writer.write(HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+class ShardServer:
+    """Serves control requests for the bots owned by one worker process"""
+    def __init__(self, index: int, service: TelethonService):
+        self.index = index
+        self.service = service
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Requests run concurrently; a slow connect must not hold up status queries
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                task = asyncio.create_task(self.respond(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            logger.error(f"Shard {self.index} control connection failed: {str(e)}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def respond(self, request: dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        try:
+            response = {"id": request.get("id"), "result": await self.dispatch(request)}
+        except Exception as e:
+            logger.error(f"Shard {self.index} failed to handle {request.get('op')}: {str(e)}")
+            response = {"id": request.get("id"), "error": str(e)}
+        async with write_lock:
+            await write_message(writer, response)
+
+    async def dispatch(self, request: dict) -> Any:
+        op = request.get("op")
+        if op == "start":
+            return await self.start_bot(request["bot_id"])
+        if op == "stop":
+            return await self.service.stop_bot(request["bot_id"])
+        if op == "send":
+            return await self.service.send_test_message(request["bot_id"], request["target"], request["message"])
+        if op == "promote":
+            return await self.service.update_promotion(request["bot_id"], request["promotion_settings"])
+        if op == "info":
+            return await self.service.get_bot_info(request["bot_id"])
+        if op == "running":
+            return await self.service.running_bots(request["bot_ids"])
+        if op == "status":
+            return {
+                "shard": self.index,
+                "pid": os.getpid(),
+                "active_clients": len(self.service.active_clients),
+                "promotion_campaigns": len(self.service.promotions.campaigns),
+                "promotion_targets": self.service.promotions.live
+            }
+        raise ShardError(f"Unknown operation: {op}")
+
+    async def start_bot(self, bot_id: int) -> bool:
+        """Credentials are read here from the database, they never cross the socket"""
+        async with AsyncSessionLocal() as db:
+            bot = await db.scalar(select(Bot).options(*BOT_RUNTIME_LOAD).where(Bot.id == bot_id))
+        if bot is None or not bot.session_string:
+            return False
+        return await self.service.start_bot(bot)
+
+class ShardConnection:
+    """One multiplexed control connection to a shard, opened on first use and after failures"""
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.next_id = 0
+        self.connect_lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
+        self.reader_task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> asyncio.StreamWriter:
+        async with self.connect_lock:
+            if self.writer is None or self.writer.is_closing():
+                try:
+                    reader, self.writer = await asyncio.open_unix_connection(self.path)
+                except OSError as e:
+                    raise ShardError(f"Shard at {self.path} is unreachable: {str(e)}")
+                self.reader_task = asyncio.create_task(self.read_responses(reader, self.writer))
+            return self.writer
+
+    async def read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                response = await read_message(reader)
+                if response is None:
+                    break
+                future = self.pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            logger.error(f"Lost connection to shard at {self.path}: {str(e)}")
+        finally:
+            writer.close()
+            if self.writer is writer:
+                self.writer = None
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ShardError(f"Connection to shard at {self.path} closed"))
+            self.pending.clear()
+
+    async def request(self, op: str, **params) -> Any:
+        writer = await self.connect()
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            async with self.write_lock:
+                try:
+                    await write_message(writer, {"id": request_id, "op": op, **params})
+                except OSError as e:
+                    # The shard died after we connected; reconnect on the next request
+                    writer.close()
+                    if self.writer is writer:
+                        self.writer = None
+                    raise ShardError(f"Shard at {self.path} is unreachable: {str(e)}")
+            response = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise ShardError(f"Shard at {self.path} did not answer {op} within {self.timeout}s")
+        finally:
+            self.pending.pop(request_id, None)
+        if "error" in response:
+            raise ShardError(response["error"])
+        return response["result"]
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        if self.reader_task is not None:
+            await asyncio.gather(self.reader_task, return_exceptions=True)
+            self.reader_task = None
+
+class ShardedBotRuntime:
+    """
+    Drop-in for the bot control methods of TelethonService that routes each
+    call to the shard owning the bot
+    """
+    def __init__(self, shard_count: int, timeout: float):
+        self.shard_count = shard_count
+        self.connections = [
+            ShardConnection(shard_socket_path(index), timeout) for index in range(shard_count)
+        ]
+
+    def connection(self, bot_id: int) -> ShardConnection:
+        return self.connections[shard_for(bot_id, self.shard_count)]
+
+    async def start_bot(self, bot: Bot) -> bool:
+        try:
+            return await self.connection(bot.id).request("start", bot_id=bot.id)
+        except ShardError as e:
+            logger.error(f"Failed to start bot {bot.id}: {str(e)}")
+            return False
+
+    async def stop_bot(self, bot_id: int) -> bool:
+        try:
+            return await self.connection(bot_id).request("stop", bot_id=bot_id)
+        except ShardError as e:
+            logger.error(f"Failed to stop bot {bot_id}: {str(e)}")
+            return False
+
+    async def send_test_message(self, bot_id: int, target: str, message: str) -> bool:
+        try:
+            return await self.connection(bot_id).request("send", bot_id=bot_id, target=target, message=message)
+        except ShardError as e:
+            logger.error(f"Failed to send test message from bot {bot_id}: {str(e)}")
+            return False
+
+    async def update_promotion(self, bot_id: int, promotion_settings: Optional[dict]) -> bool:
+        try:
+            return await self.connection(bot_id).request(
+                "promote", bot_id=bot_id, promotion_settings=promotion_settings
+            )
+        except ShardError as e:
+            logger.error(f"Failed to update promotions of bot {bot_id}: {str(e)}")
+            return False
+
+    async def get_bot_info(self, bot_id: int) -> dict:
+        try:
+            return await self.connection(bot_id).request("info", bot_id=bot_id)
+        except ShardError as e:
+            logger.error(f"Failed to get bot info for {bot_id}: {str(e)}")
+            return {"status": "error", "info": None}
+
+    async def running_bots(self, bot_ids: List[int]) -> List[int]:
+        """The subset of bot_ids with a connected client, one request per shard involved"""
+        by_shard: Dict[int, List[int]] = {}
+        for bot_id in bot_ids:
+            by_shard.setdefault(shard_for(bot_id, self.shard_count), []).append(bot_id)
+        results = await asyncio.gather(
+            *(self.connections[shard].request("running", bot_ids=ids) for shard, ids in by_shard.items()),
+            return_exceptions=True
+        )
+        running = set()
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to query running bots: {str(result)}")
+            else:
+                running.update(result)
+        return [bot_id for bot_id in bot_ids if bot_id in running]
+
+    async def status(self) -> List[dict]:
+        results = await asyncio.gather(
+            *(connection.request("status") for connection in self.connections), return_exceptions=True
+        )
+        return [
+            {"shard": index, "error": str(result)} if isinstance(result, Exception) else result
+            for index, result in enumerate(results)
+        ]
+
+    async def close(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self.connections))
+
+# Global instances; routes use bot_runtime whichever mode is configured
+shard_client = ShardedBotRuntime(
+    settings.TELETHON_SHARDS,
+    timeout=settings.TELETHON_SHARD_REQUEST_TIMEOUT_SECONDS
+)
+bot_runtime = shard_client if settings.TELETHON_SHARDS > 0 else telethon_service
+
+async def serve_shard(index: int, shard_count: int) -> None:
+    """Worker process body: control socket, supervisor and auto-resume for one shard"""
+    path = shard_socket_path(index)
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(ShardServer(index, telethon_service).handle, path=path)
+    resumer = FleetResumer(
+        telethon_service,
+        concurrency=settings.TELETHON_RESUME_CONCURRENCY,
+        jitter_seconds=settings.TELETHON_RESUME_JITTER_SECONDS,
+        batch_size=settings.TELETHON_RESUME_BATCH_SIZE,
+        owns=lambda bot_id: shard_for(bot_id, shard_count) == index
+    )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    if settings.TELETHON_SUPERVISOR_ENABLED:
+        telethon_service.supervisor.start()
+    if settings.TELETHON_AUTO_RESUME:
+        resumer.start()
+    logger.info(f"Shard {index}/{shard_count} listening on {path}")
+
+    try:
+        await stopping.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await resumer.stop()
+        await telethon_service.supervisor.stop()
+        await telethon_service.promotions.stop()
+        # Stored statuses stay online so the next start resumes these bots
+        await asyncio.gather(*(telethon_service.stop_bot(bot_id) for bot_id in list(telethon_service.active_clients)))
+        await async_engine.dispose()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def run_shard(index: int, shard_count: int) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s shard-{index} %(name)s %(levelname)s %(message)s"
+    )
+    asyncio.run(serve_shard(index, shard_count))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the userbot runtime as sharded worker processes")
+    parser.add_argument("--shards", type=int, default=settings.TELETHON_SHARDS,
+                        help="Worker processes, must match the API's TELETHON_SHARDS")
+    args = parser.parse_args()
+    if args.shards < 1:
+        parser.error("set TELETHON_SHARDS or pass --shards")
+
+    os.makedirs(settings.TELETHON_SHARD_SOCKET_DIR, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+
+    def spawn(index: int):
+        process = context.Process(target=run_shard, args=(index, args.shards), name=f"shard-{index}")
+        process.start()
+        return process
+
+    processes = [spawn(index) for index in range(args.shards)]
+    print(f"✅ Started {args.shards} userbot shards in {settings.TELETHON_SHARD_SOCKET_DIR}")
+
+    stopping = False
+    def terminate(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+
+    # Respawn crashed shards until asked to stop; a new worker resumes its bots
+    while not stopping:
+        for index, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                print(f"⚠️ Shard {index} exited with {process.exitcode}, restarting")
+                processes[index] = spawn(index)
+        time.sleep(1)
+
+    for process in processes:
+        process.join()
+    print("🛑 Userbot shards stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import load_only
+from ..core.database import AsyncSessionLocal
+from ..models.bot import Bot
+from .background import PeriodicTask
+
+if TYPE_CHECKING:
+    from .telethon_service import TelethonService
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class BotHealth:
+    started_at: datetime
+    last_seen: datetime
+    failures: int = 0
+    retry_at: float = 0.0  # monotonic time of the next reconnect attempt
+
+class BotSupervisor(PeriodicTask):
+    """
+    Watches every client in TelethonService.active_clients
+    Each tick checks is_connected() (no network I/O) for every client and
+    reconnects the dropped ones with exponential backoff plus jitter. A
+    client whose session was revoked, or that keeps failing for max_attempts
+    reconnects, is stopped and marked "error". Status changes and last_seen
+    timestamps are flushed to the bots table once per tick, in one
+    transaction.
+    """
+    failure_message = "Bot supervisor tick failed"
+
+    def __init__(self, service: "TelethonService", interval_seconds: float, backoff_base: float,
+                 backoff_max: float, max_attempts: int, connect_timeout: float, concurrency: int):
+        super().__init__(interval_seconds)
+        self.service = service
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.connect_timeout = connect_timeout
+        self.concurrency = concurrency
+        self.health: Dict[int, BotHealth] = {}
+        # Status changes waiting for the next flush, by bot id
+        self.pending_status: Dict[int, str] = {}
+
+    def track(self, bot_id: int) -> None:
+        """Start supervising a freshly connected client"""
+        now = datetime.utcnow()
+        self.health[bot_id] = BotHealth(started_at=now, last_seen=now)
+        self.pending_status[bot_id] = "online"
+
+    def forget(self, bot_id: int) -> None:
+        self.health.pop(bot_id, None)
+        self.pending_status.pop(bot_id, None)
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        await super().stop()
+        await self.flush()
+
+    async def tick(self) -> None:
+        await self.check()
+        await self.flush()
+
+    async def check(self) -> None:
+        """Refresh last_seen for connected clients and reconnect the ones that are due"""
+        now = datetime.utcnow()
+        due = []
+        for bot_id, client in list(self.service.active_clients.items()):
+            health = self.health.get(bot_id)
+            if health is None:
+                self.track(bot_id)
+                continue
+            if client.is_connected():
+                health.last_seen = now
+                if health.failures:
+                    health.failures = 0
+                    self.pending_status[bot_id] = "online"
+            elif time.monotonic() >= health.retry_at:
+                due.append(bot_id)
+
+        if due:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(self.reconnect(bot_id, semaphore) for bot_id in due))
+
+    def backoff(self, failures: int) -> float:
+        """Delay before attempt failures + 1: doubled per failure, capped, with +/-50% jitter"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def reconnect(self, bot_id: int, semaphore: asyncio.Semaphore) -> None:
+        client = self.service.active_clients.get(bot_id)
+        health = self.health.get(bot_id)
+        if client is None or health is None:
+            return
+        if health.failures == 0:
+            logger.warning(f"Bot {bot_id} disconnected, reconnecting")
+            self.pending_status[bot_id] = "restarting"
+
+        async with semaphore:
+            try:
+                await asyncio.wait_for(client.connect(), self.connect_timeout)
+                authorized = await client.is_user_authorized()
+            except Exception as e:
+                health.failures += 1
+                if health.failures >= self.max_attempts:
+                    logger.error(f"Bot {bot_id} failed to reconnect {health.failures} times, giving up: {str(e)}")
+                    await self.give_up(bot_id)
+                else:
+                    health.retry_at = time.monotonic() + self.backoff(health.failures)
+                return
+
+        if not authorized:
+            logger.error(f"Bot {bot_id} session is no longer authorized")
+            await self.give_up(bot_id)
+            return
+
+        now = datetime.utcnow()
+        health.started_at = now
+        health.last_seen = now
+        health.failures = 0
+        self.pending_status[bot_id] = "online"
+        logger.info(f"Bot {bot_id} reconnected")
+
+    async def give_up(self, bot_id: int) -> None:
+        await self.service.stop_bot(bot_id)
+        self.pending_status[bot_id] = "error"
+
+    async def flush(self) -> None:
+        """Write queued status changes and every supervised bot's timestamps in one transaction"""
+        statuses, self.pending_status = self.pending_status, {}
+        timestamps = [
+            {"bot_id": bot_id, "started_at": health.started_at, "last_seen": health.last_seen}
+            for bot_id, health in self.health.items()
+        ]
+        if not statuses and not timestamps:
+            return
+
+        try:
+            async with AsyncSessionLocal() as db:
+                if timestamps:
+                    bots = Bot.__table__
+                    await db.execute(
+                        update(bots)
+                        .where(bots.c.id == bindparam("bot_id"))
+                        .values(started_at=bindparam("started_at"), last_seen=bindparam("last_seen")),
+                        timestamps
+                    )
+                if statuses:
+                    # Through the ORM so the users' bot counters follow the status change
+                    for bot in (await db.scalars(
+                        select(Bot)
+                        .options(load_only(Bot.id, Bot.user_id, Bot.status))
+                        .where(Bot.id.in_(list(statuses)))
+                    )).all():
+                        bot.status = statuses[bot.id]
+                await db.commit()
+        except Exception:
+            # Newer changes queued meanwhile win over the ones being retried
+            self.pending_status = {**statuses, **self.pending_status}
+            raise
@@ -0,0 +1,103 @@
+"""
+Fleet auto-resume for Sentinel Ubot Backend
+
+After a restart active_clients is empty while the bots table still says
+which bots were online. FleetResumer reconnects them from the application
+lifespan: bots are read in id-ordered batches, connected concurrently under
+a semaphore with a random delay before each connect so thousands of clients
+don't hit Telegram at once, and every batch's failures are written back in
+one transaction.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Callable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.bot import Bot, BOT_RUNTIME_LOAD
+from .background import BackgroundTask
+from .telethon_service import TelethonService, telethon_service
+
+logger = logging.getLogger(__name__)
+
+class FleetResumer(BackgroundTask):
+    """Reconnects every bot whose stored status is online, once per startup"""
+    def __init__(self, service: TelethonService, concurrency: int, jitter_seconds: float,
+                 batch_size: int, owns: Optional[Callable[[int], bool]] = None):
+        super().__init__()
+        self.service = service
+        # Sharded workers only resume the bots hashed to them
+        self.owns = owns
+        self.concurrency = concurrency
+        self.jitter_seconds = jitter_seconds
+        self.batch_size = batch_size
+        self.resumed = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        try:
+            await self.resume_all()
+            logger.info(f"Fleet resume finished: {self.resumed} bots online, {self.failed} failed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Fleet resume failed: {str(e)}")
+
+    async def resume_all(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_id = 0
+        while True:
+            bots = await self.load_batch(last_id)
+            if not bots:
+                return
+            last_id = bots[-1].id
+            if self.owns is not None:
+                bots = [bot for bot in bots if self.owns(bot.id)]
+            results = await asyncio.gather(*(self.resume(bot, semaphore) for bot in bots))
+            failed = [bot.id for bot, started in zip(bots, results) if not started]
+            self.resumed += len(bots) - len(failed)
+            self.failed += len(failed)
+            if failed:
+                await self.mark_failed(failed)
+
+    async def load_batch(self, after_id: int) -> List[Bot]:
+        """Next batch of bots that should be online, with the credentials start_bot needs"""
+        async with AsyncSessionLocal() as db:
+            return (await db.scalars(
+                select(Bot)
+                .options(*BOT_RUNTIME_LOAD)
+                .where(Bot.status == "online", Bot.id > after_id)
+                .order_by(Bot.id)
+                .limit(self.batch_size)
+            )).all()
+
+    async def resume(self, bot: Bot, semaphore: asyncio.Semaphore) -> bool:
+        if bot.id in self.service.active_clients:
+            return True
+        if not bot.session_string:
+            return False
+        # Jitter before taking a slot, so no slot sits idle through it
+        await asyncio.sleep(random.uniform(0, self.jitter_seconds))
+        async with semaphore:
+            return await self.service.start_bot(bot)
+
+    async def mark_failed(self, bot_ids: List[int]) -> None:
+        """Set status=error for one batch in a single transaction (bot counters follow via the ORM)"""
+        async with AsyncSessionLocal() as db:
+            bots = (await db.scalars(
+                select(Bot).options(load_only(Bot.id, Bot.user_id, Bot.status)).where(Bot.id.in_(bot_ids))
+            )).all()
+            for bot in bots:
+                bot.status = "error"
+            await db.commit()
+
+# Global instance
+fleet_resumer = FleetResumer(
+    telethon_service,
+    concurrency=settings.TELETHON_RESUME_CONCURRENCY,
+    jitter_seconds=settings.TELETHON_RESUME_JITTER_SECONDS,
+    batch_size=settings.TELETHON_RESUME_BATCH_SIZE
+)
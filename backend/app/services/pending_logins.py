@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+class PendingLoginRegistry:
+    """
+    Connected Telethon clients of logins waiting for a code or 2FA password
+    Keyed by (user id, phone number): the first step runs before the bot row
+    exists, and two users may log in the same number. Keeping the client
+    keeps its MTProto connection and sign-in state (the sent code hash), so
+    each verification step is one request.
+    Entries idle for ttl_seconds are disconnected on the next access, and
+    the least recently used entry is disconnected when max_size is reached.
+    """
+    def __init__(self, ttl_seconds: float = 600, max_size: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    async def get(self, key: Hashable) -> Optional[TelegramClient]:
+        """Return the pending client for key and refresh its TTL"""
+        await self.sweep()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        client = entry[1]
+        if not client.is_connected():
+            await self.discard(key)
+            return None
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, client)
+        self._entries.move_to_end(key)
+        return client
+
+    async def put(self, key: Hashable, client: TelegramClient) -> None:
+        """Register client for key, disconnecting whatever it replaces or evicts"""
+        await self.sweep()
+        previous = self._entries.pop(key, None)
+        if previous is not None and previous[1] is not client:
+            await self.disconnect(key, previous[1])
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, client)
+        while len(self._entries) > self.max_size:
+            evicted_key, (_, evicted) = self._entries.popitem(last=False)
+            await self.disconnect(evicted_key, evicted)
+
+    def pop(self, key: Hashable) -> Optional[TelegramClient]:
+        """Remove key and hand its client back to the caller without disconnecting it"""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    async def discard(self, key: Hashable) -> None:
+        """Remove key and disconnect its client"""
+        client = self.pop(key)
+        if client is not None:
+            await self.disconnect(key, client)
+
+    async def sweep(self) -> int:
+        """Disconnect entries whose TTL has passed, returns how many were dropped"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            await self.discard(key)
+        return len(expired)
+
+    async def close(self) -> None:
+        """Disconnect every pending client"""
+        clients = list(self._entries.items())
+        self._entries.clear()
+        await asyncio.gather(*(self.disconnect(key, client) for key, (_, client) in clients))
+
+    @staticmethod
+    async def disconnect(key: Hashable, client: TelegramClient) -> None:
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.warning(f"Failed to disconnect pending login {key}: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class Campaign:
+    message: str
+    interval: float
+    # Target -> token of its one live heap entry; entries with another token are stale
+    targets: Dict[str, int] = field(default_factory=dict)
+
+class PromotionScheduler:
+    """
+    One min-heap of (fire_at, token, bot_id, target) for every promoting bot
+    A single dispatcher task pops due entries, reschedules them one period
+    later and hands the sends to a fixed pool of worker tasks through a
+    bounded queue, so due sends go out oldest first and a slow Telegram call
+    never delays the clock. Settings changes update the campaign in place:
+    removed targets are skipped lazily through their token and added ones
+    get an entry of their own. Like the old per-bot loop, each target repeats
+    every interval plus one spacing per target, and sends of one bot never
+    overlap and start at least spacing_seconds apart: the dispatcher defers
+    an entry that comes due inside its bot's gap, and workers send under a
+    per-bot lock after waiting out the rest of the gap, which a backlog in
+    the queue could otherwise squeeze.
+    """
+    def __init__(self, send: Callable[[int, str, str], Awaitable[bool]], workers: int = 32,
+                 spacing_seconds: float = 5.0):
+        self.send = send
+        self.workers = workers
+        self.spacing_seconds = spacing_seconds
+        self.campaigns: Dict[int, Campaign] = {}
+        self.heap: List[Tuple[float, int, int, str]] = []
+        self.tokens = itertools.count()
+        self.live = 0  # Targets with a valid heap entry
+        self.wakeup = asyncio.Event()
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        # Per bot: earliest dispatch of its next send, start of its last send, send lock
+        self.next_slot: Dict[int, float] = {}
+        self.last_sent: Dict[int, float] = {}
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.sent = 0
+        self.skipped = 0  # send() returned False: nothing went out, e.g. the bot was stopped
+        self.failed = 0
+        self.lag = 0.0  # How late the last dispatched send was, in seconds
+
+    def schedule(self, bot_id: int, promotion_settings: Optional[dict]) -> None:
+        """Create or update bot_id's campaign from its promotion_settings"""
+        promotion_settings = promotion_settings or {}
+        targets = list(dict.fromkeys(promotion_settings.get('target_groups') or []))
+        if not promotion_settings.get('enabled') or not targets:
+            self.unschedule(bot_id)
+            return
+
+        campaign = self.campaigns.get(bot_id)
+        if campaign is None:
+            campaign = self.campaigns[bot_id] = Campaign(message="", interval=0)
+        campaign.message = promotion_settings.get('message_template', '')
+        campaign.interval = promotion_settings.get('interval', 3600)
+        for removed in set(campaign.targets).difference(targets):
+            del campaign.targets[removed]
+            self.live -= 1
+
+        now = time.monotonic()
+        added = [target for target in targets if target not in campaign.targets]
+        for position, target in enumerate(added):
+            self.push(bot_id, target, now + position * self.spacing_seconds, campaign)
+        self.live += len(added)
+
+        self.start()
+        self.wakeup.set()
+
+    def unschedule(self, bot_id: int) -> None:
+        campaign = self.campaigns.pop(bot_id, None)
+        if campaign is not None:
+            self.live -= len(campaign.targets)
+        self.next_slot.pop(bot_id, None)
+        lock = self.locks.get(bot_id)
+        if lock is not None and not lock.locked():
+            del self.locks[bot_id]
+            self.last_sent.pop(bot_id, None)
+
+    def push(self, bot_id: int, target: str, fire_at: float, campaign: Campaign) -> None:
+        token = next(self.tokens)
+        campaign.targets[target] = token
+        heapq.heappush(self.heap, (fire_at, token, bot_id, target))
+
+    def period(self, campaign: Campaign) -> float:
+        return campaign.interval + self.spacing_seconds * len(campaign.targets)
+
+    def start(self) -> None:
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=self.workers * 4)
+        self.tasks = [asyncio.create_task(self.dispatch())]
+        self.tasks += [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def dispatch(self) -> None:
+        while True:
+            self.wakeup.clear()
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                fire_at, token, bot_id, target = heapq.heappop(self.heap)
+                if not self.is_live(bot_id, target, token):
+                    continue
+                slot = self.next_slot.get(bot_id, now)
+                if slot > now:
+                    # Another target of this bot was dispatched less than spacing_seconds ago
+                    heapq.heappush(self.heap, (slot, token, bot_id, target))
+                    continue
+                self.next_slot[bot_id] = now + self.spacing_seconds
+                campaign = self.campaigns[bot_id]
+                # Due times don't drift with send latency; a backlog is not replayed in a burst
+                self.push(bot_id, target, max(fire_at + self.period(campaign), now), campaign)
+                self.lag = now - fire_at
+                # Blocks while every worker is busy and the queue is full
+                await self.queue.put((bot_id, target, campaign.message))
+                now = time.monotonic()
+
+            if len(self.heap) > 2 * self.live + 1024:
+                self.compact()
+            timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+            # asyncio.wait, unlike wait_for, never swallows a cancel racing with the wakeup
+            waiter = asyncio.ensure_future(self.wakeup.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=timeout)
+            finally:
+                waiter.cancel()
+
+    def is_live(self, bot_id: int, target: str, token: int) -> bool:
+        campaign = self.campaigns.get(bot_id)
+        return campaign is not None and campaign.targets.get(target) == token
+
+    def compact(self) -> None:
+        """Drop stale entries left behind by removed targets and campaigns"""
+        self.heap = [entry for entry in self.heap if self.is_live(entry[2], entry[3], entry[1])]
+        heapq.heapify(self.heap)
+
+    async def work(self) -> None:
+        while True:
+            bot_id, target, message = await self.queue.get()
+            try:
+                lock = self.locks.get(bot_id)
+                if lock is None:
+                    lock = self.locks[bot_id] = asyncio.Lock()
+                async with lock:
+                    delay = self.last_sent.get(bot_id, float("-inf")) + self.spacing_seconds - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self.last_sent[bot_id] = time.monotonic()
+                    sent = await self.send(bot_id, target, message)
+                if sent:
+                    self.sent += 1
+                else:
+                    self.skipped += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to send promotion to {target} by bot {bot_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Expired-session pruning for Sentinel Ubot Backend
+
+Runs as a background task from the application lifespan, or once from the
+command line: python -m app.services.session_pruner [--batch-size 500] [--vacuum]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy import delete, or_, select, text
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, async_engine, engine, is_sqlite_url
+from ..models.session import Session as UserSession
+from .background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+async def prune_sessions(batch_size: int = settings.SESSION_PRUNE_BATCH_SIZE) -> int:
+    """
+    Delete expired and logged-out sessions in batches of batch_size rows
+    Each batch is its own short transaction so logins are never blocked for long.
+    Returns the number of rows deleted.
+    """
+    now = datetime.utcnow()
+    reclaimable = select(UserSession.id).where(
+        or_(UserSession.expires_at < now, UserSession.is_active == False)
+    ).limit(batch_size)
+
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(UserSession).where(UserSession.id.in_(reclaimable)))
+            await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+        # Let request handlers run between batches
+        await asyncio.sleep(0)
+
+def vacuum_database() -> None:
+    """Return freed pages to the filesystem (SQLite only, takes an exclusive lock)"""
+    if not is_sqlite_url(settings.DATABASE_URL):
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM"))
+
+class SessionPruner(PeriodicTask):
+    """Periodically prunes the sessions table while the application runs"""
+    failure_message = "Session pruning failed"
+
+    def __init__(self, interval_seconds: float, batch_size: int):
+        super().__init__(interval_seconds)
+        self.batch_size = batch_size
+        self.last_pruned = 0
+
+    async def tick(self) -> None:
+        self.last_pruned = await prune_sessions(self.batch_size)
+        if self.last_pruned:
+            logger.info(f"Pruned {self.last_pruned} expired or inactive sessions")
+
+# Global instance
+session_pruner = SessionPruner(
+    interval_seconds=settings.SESSION_PRUNE_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_PRUNE_BATCH_SIZE
+)
+
+async def run_once(batch_size: int) -> int:
+    try:
+        return await prune_sessions(batch_size)
+    finally:
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired and inactive sessions")
+    parser.add_argument("--batch-size", type=int, default=settings.SESSION_PRUNE_BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true", help="compact the SQLite file afterwards")
+    args = parser.parse_args()
+
+    pruned = asyncio.run(run_once(args.batch_size))
+    print(f"✅ Pruned {pruned} expired or inactive sessions")
+    if args.vacuum:
+        vacuum_database()
+        print("✅ Database compacted")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,45 @@
-import asyncio
 import logging
 from typing import Dict, Optional, List
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
-from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
+from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError, PasswordHashInvalidError
 from telethon.tl.types import PeerChannel, PeerChat, PeerUser
 import python_socks
 from sqlalchemy.orm import Session
 from ..models.bot import Bot
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.metrics import metrics
+from .bot_supervisor import BotSupervisor
+from .pending_logins import PendingLoginRegistry
+from .promotion_scheduler import PromotionScheduler
 
 logger = logging.getLogger(__name__)
 
+messages_sent = metrics.counter("telethon_messages_sent_total", "Messages sent by userbots", ("kind",))
+messages_failed = metrics.counter("telethon_messages_failed_total", "Messages userbots failed to send", ("kind",))
+
 class TelethonService:
     def __init__(self):
         self.active_clients: Dict[int, TelegramClient] = {}
-        self.promotion_tasks: Dict[int, asyncio.Task] = {}
+        self.promotions = PromotionScheduler(
+            self.send_promotion,
+            workers=settings.PROMOTION_WORKERS,
+            spacing_seconds=settings.PROMOTION_SEND_SPACING_SECONDS
+        )
+        self.pending_logins = PendingLoginRegistry(
+            ttl_seconds=settings.TELETHON_PENDING_LOGIN_TTL_SECONDS,
+            max_size=settings.TELETHON_PENDING_LOGIN_MAX
+        )
+        self.supervisor = BotSupervisor(
+            self,
+            interval_seconds=settings.TELETHON_SUPERVISOR_INTERVAL_SECONDS,
+            backoff_base=settings.TELETHON_RECONNECT_BASE_SECONDS,
+            backoff_max=settings.TELETHON_RECONNECT_MAX_SECONDS,
+            max_attempts=settings.TELETHON_RECONNECT_MAX_ATTEMPTS,
+            connect_timeout=settings.TELETHON_RECONNECT_TIMEOUT_SECONDS,
+            concurrency=settings.TELETHON_RECONNECT_CONCURRENCY
+        )
     
     async def create_client(self, bot_id: int, api_id: str, api_hash: str, 
                           session_string: str = None, proxy_config: dict = None) -> TelegramClient:
@@ -55,16 +79,41 @@ class TelethonService:
         
         return client
     
+    async def login_client(self, login_key: tuple, bot_id: int, api_id: str, api_hash: str,
+                           proxy_config: dict = None) -> TelegramClient:
+        """
+        The pending login client for login_key, or a freshly connected one
+        A fresh client is registered as soon as it is connected, so every
+        failure path can release it with pending_logins.discard(login_key).
+        """
+        client = await self.pending_logins.get(login_key)
+        if client is None:
+            client = await self.create_client(bot_id, api_id, api_hash, proxy_config=proxy_config)
+            try:
+                await client.connect()
+            except Exception:
+                await PendingLoginRegistry.disconnect(login_key, client)
+                raise
+            await self.pending_logins.put(login_key, client)
+        return client
+    
+    async def finish_login(self, login_key: tuple, client: TelegramClient) -> str:
+        """Return the session string and release the login client"""
+        session_string = client.session.save()
+        self.pending_logins.pop(login_key)
+        await client.disconnect()
+        return session_string
+    
     async def authenticate_bot(self, bot_id: int, phone_number: str, api_id: str, 
-                             api_hash: str, proxy_config: dict = None) -> dict:
+                             api_hash: str, proxy_config: dict = None, user_id: int = None) -> dict:
         """Start authentication process for a new bot"""
+        # Pending logins are per user, two users may log in the same number
+        login_key = (user_id, phone_number)
         try:
-            client = await self.create_client(bot_id, api_id, api_hash, proxy_config=proxy_config)
-            
-            await client.connect()
+            client = await self.login_client(login_key, bot_id, api_id, api_hash, proxy_config)
             
             if not await client.is_user_authorized():
-                # Send code request
+                # Send code request, the client stays connected for the verification steps
                 sent_code = await client.send_code_request(phone_number)
                 
                 return {
@@ -74,8 +123,7 @@ class TelethonService:
                 }
             else:
                 # Already authorized
-                session_string = client.session.save()
-                await client.disconnect()
+                session_string = await self.finish_login(login_key, client)
                 
                 return {
                     "status": "authenticated",
@@ -85,6 +133,7 @@ class TelethonService:
                 
         except Exception as e:
             logger.error(f"Authentication error for bot {bot_id}: {str(e)}")
+            await self.pending_logins.discard(login_key)
             return {
                 "status": "error",
                 "message": f"Authentication failed: {str(e)}"
@@ -92,11 +141,12 @@ class TelethonService:
     
     async def verify_code(self, bot_id: int, phone_number: str, api_id: str, 
                          api_hash: str, phone_code: str, phone_code_hash: str,
-                         proxy_config: dict = None) -> dict:
+                         proxy_config: dict = None, user_id: int = None) -> dict:
         """Verify the phone code and complete authentication"""
+        login_key = (user_id, phone_number)
         try:
-            client = await self.create_client(bot_id, api_id, api_hash, proxy_config=proxy_config)
-            await client.connect()
+            # Stays registered through a 2FA prompt so the password step reuses the signed-in state
+            client = await self.login_client(login_key, bot_id, api_id, api_hash, proxy_config)
             
             try:
                 await client.sign_in(phone_number, phone_code, phone_code_hash=phone_code_hash)
@@ -112,8 +162,7 @@ class TelethonService:
                 }
             
             # Get session string
-            session_string = client.session.save()
-            await client.disconnect()
+            session_string = await self.finish_login(login_key, client)
             
             return {
                 "status": "authenticated",
@@ -123,23 +172,24 @@ class TelethonService:
             
         except Exception as e:
             logger.error(f"Code verification error for bot {bot_id}: {str(e)}")
+            await self.pending_logins.discard(login_key)
             return {
                 "status": "error",
                 "message": f"Code verification failed: {str(e)}"
             }
     
     async def verify_password(self, bot_id: int, api_id: str, api_hash: str, 
-                            password: str, proxy_config: dict = None) -> dict:
+                            password: str, proxy_config: dict = None,
+                            phone_number: str = None, user_id: int = None) -> dict:
         """Verify 2FA password"""
+        login_key = (user_id, phone_number)
         try:
-            client = await self.create_client(bot_id, api_id, api_hash, proxy_config=proxy_config)
-            await client.connect()
+            client = await self.login_client(login_key, bot_id, api_id, api_hash, proxy_config)
             
             await client.sign_in(password=password)
             
             # Get session string
-            session_string = client.session.save()
-            await client.disconnect()
+            session_string = await self.finish_login(login_key, client)
             
             return {
                 "status": "authenticated",
@@ -147,8 +197,15 @@ class TelethonService:
                 "message": "Bot authenticated successfully"
             }
             
+        except PasswordHashInvalidError:
+            # The pending client is kept so the user can retry a mistyped password
+            return {
+                "status": "invalid_password",
+                "message": "Invalid two-factor authentication password"
+            }
         except Exception as e:
             logger.error(f"Password verification error for bot {bot_id}: {str(e)}")
+            await self.pending_logins.discard(login_key)
             return {
                 "status": "error",
                 "message": f"Password verification failed: {str(e)}"
@@ -186,10 +243,10 @@ class TelethonService:
             
             # Store active client
             self.active_clients[bot.id] = client
+            self.supervisor.track(bot.id)
             
-            # Start promotion task if enabled
-            if bot.promotion_settings and bot.promotion_settings.get('enabled'):
-                await self.start_promotion_task(bot)
+            # Schedule promotions if enabled
+            self.promotions.schedule(bot.id, bot.promotion_settings)
             
             logger.info(f"Bot {bot.id} started successfully")
             return True
@@ -201,15 +258,14 @@ class TelethonService:
     async def stop_bot(self, bot_id: int) -> bool:
         """Stop a userbot"""
         try:
-            # Stop promotion task
-            if bot_id in self.promotion_tasks:
-                self.promotion_tasks[bot_id].cancel()
-                del self.promotion_tasks[bot_id]
+            # Stop promotions
+            self.promotions.unschedule(bot_id)
             
             # Disconnect client
             if bot_id in self.active_clients:
                 await self.active_clients[bot_id].disconnect()
                 del self.active_clients[bot_id]
+            self.supervisor.forget(bot_id)
             
             logger.info(f"Bot {bot_id} stopped successfully")
             return True
@@ -218,44 +274,26 @@ class TelethonService:
             logger.error(f"Failed to stop bot {bot_id}: {str(e)}")
             return False
     
-    async def start_promotion_task(self, bot: Bot):
-        """Start automated promotion task for a bot"""
-        async def promotion_loop():
-            client = self.active_clients.get(bot.id)
-            if not client:
-                return
-            
-            settings = bot.promotion_settings
-            message_template = settings.get('message_template', '')
-            target_groups = settings.get('target_groups', [])
-            interval = settings.get('interval', 3600)
-            
-            while True:
-                try:
-                    for group in target_groups:
-                        try:
-                            # Send message to group
-                            await client.send_message(group, message_template)
-                            logger.info(f"Promotion message sent to {group} by bot {bot.id}")
-                            
-                            # Wait between messages to avoid spam
-                            await asyncio.sleep(5)
-                            
-                        except Exception as e:
-                            logger.error(f"Failed to send promotion to {group}: {str(e)}")
-                    
-                    # Wait for next cycle
-                    await asyncio.sleep(interval)
-                    
-                except asyncio.CancelledError:
-                    break
-                except Exception as e:
-                    logger.error(f"Promotion task error for bot {bot.id}: {str(e)}")
-                    await asyncio.sleep(60)  # Wait before retrying
+    async def update_promotion(self, bot_id: int, promotion_settings: Optional[dict]) -> bool:
+        """Apply new promotion settings to a running bot without reconnecting it"""
+        if bot_id not in self.active_clients:
+            return False
+        self.promotions.schedule(bot_id, promotion_settings)
+        return True
+    
+    async def send_promotion(self, bot_id: int, target: str, message: str) -> bool:
+        """Send one scheduled promotion message, returns False if the bot is no longer running"""
+        client = self.active_clients.get(bot_id)
+        if not client:
+            return False  # Stopped after the send was queued
         
-        # Create and store task
-        task = asyncio.create_task(promotion_loop())
-        self.promotion_tasks[bot.id] = task
+        try:
+            await client.send_message(target, message)
+            messages_sent.inc("promotion")
+            return True
+        except Exception:
+            messages_failed.inc("promotion")
+            raise
     
     async def get_bot_info(self, bot_id: int) -> dict:
         """Get information about a running bot"""
@@ -279,6 +317,10 @@ class TelethonService:
             logger.error(f"Failed to get bot info for {bot_id}: {str(e)}")
             return {"status": "error", "info": None}
     
+    async def running_bots(self, bot_ids: List[int]) -> List[int]:
+        """The subset of bot_ids with a client in this process"""
+        return [bot_id for bot_id in bot_ids if bot_id in self.active_clients]
+    
     async def send_test_message(self, bot_id: int, target: str, message: str) -> bool:
         """Send a test message to verify bot functionality"""
         client = self.active_clients.get(bot_id)
@@ -287,10 +329,29 @@ class TelethonService:
         
         try:
             await client.send_message(target, message)
+            messages_sent.inc("test")
             return True
         except Exception as e:
+            messages_failed.inc("test")
             logger.error(f"Failed to send test message from bot {bot_id}: {str(e)}")
             return False
 
 # Global service instance
 telethon_service = TelethonService()
+
+metrics.gauge(
+    "telethon_active_clients", "Connected userbot clients",
+    lambda: len(telethon_service.active_clients)
+)
+metrics.gauge(
+    "telethon_promotion_campaigns", "Bots with scheduled promotions",
+    lambda: len(telethon_service.promotions.campaigns)
+)
+metrics.gauge(
+    "telethon_promotion_targets", "Scheduled promotion targets",
+    lambda: telethon_service.promotions.live
+)
+metrics.gauge(
+    "telethon_promotion_lag_seconds", "How late the last promotion send was dispatched",
+    lambda: telethon_service.promotions.lag
+)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Event loop latency benchmark: sync SessionLocal vs AsyncSession
+
+Runs the same mix of bot list reads and status writes from concurrent
+coroutines, first through a blocking sync session (how the routers used to
+talk to the database) and then through the aiosqlite AsyncSession path.
+A heartbeat coroutine measures how long the loop stalls, which is the delay
+every other request and Telethon client sees while a query is running.
+
+Usage: python -m benchmarks.bench_async_db [--concurrency 50] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_async_database_url
+from app.models import Bot, User
+
+def percentile(samples, pct):
+    """Return the pct percentile of samples in milliseconds"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+def seed(url: str, users: int, bots_per_user: int):
+    """Create the schema and a fleet of bots"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        for user_index in range(users):
+            user = User(telegram_id=str(user_index), username=f"user{user_index}", first_name="Bench")
+            db.add(user)
+            db.flush()
+            for bot_index in range(bots_per_user):
+                db.add(Bot(
+                    user_id=user.id,
+                    name=f"bot-{user_index}-{bot_index}",
+                    phone_number=f"+{user_index:05d}{bot_index:05d}",
+                    session_string="x" * 400,
+                    status="offline"
+                ))
+        db.commit()
+    engine.dispose()
+
+async def heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    """Record how late the event loop wakes us up"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+async def sync_operation(session_factory, user_id: int, write: bool):
+    # Blocking calls made straight from a coroutine, as the old routers did
+    with session_factory() as db:
+        if write:
+            db.execute(update(Bot).where(Bot.user_id == user_id).values(status=random.choice(["online", "offline"])))
+            db.commit()
+        else:
+            db.scalars(select(Bot).where(Bot.user_id == user_id)).all()
+
+async def async_operation(session_factory, user_id: int, write: bool):
+    async with session_factory() as db:
+        if write:
+            await db.execute(update(Bot).where(Bot.user_id == user_id).values(status=random.choice(["online", "offline"])))
+            await db.commit()
+        else:
+            (await db.scalars(select(Bot).where(Bot.user_id == user_id))).all()
+
+async def run_phase(name: str, operation, args):
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait((random.randint(1, args.users), random.random() < args.write_ratio))
+
+    async def worker():
+        while not queue.empty():
+            user_id, write = queue.get_nowait()
+            started = time.perf_counter()
+            await operation(user_id, write)
+            latencies.append(time.perf_counter() - started)
+            # Yield like a request handler returning to the server loop
+            await asyncio.sleep(0)
+
+    probe = asyncio.create_task(heartbeat(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    print(f"\n{name}")
+    print(f"   throughput      : {args.requests / elapsed:,.0f} ops/s")
+    print(f"   query p50 / p99 : {percentile(latencies, 50):.2f} ms / {percentile(latencies, 99):.2f} ms")
+    print(f"   loop lag p50/p99: {percentile(lags, 50):.2f} ms / {percentile(lags, 99):.2f} ms"
+          f" (max {max(lags) * 1000:.2f} ms, mean {statistics.mean(lags) * 1000:.2f} ms)")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--bots-per-user", type=int, default=20)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{directory}/bench.db"
+        seed(url, args.users, args.bots_per_user)
+
+        sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+        sync_factory = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+        await run_phase(
+            "Before: sync SessionLocal inside async routes",
+            lambda user_id, write: sync_operation(sync_factory, user_id, write),
+            args
+        )
+        sync_engine.dispose()
+
+        async_engine = create_async_engine(get_async_database_url(url))
+        async_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+        await run_phase(
+            "After: AsyncSession on aiosqlite",
+            lambda user_id, write: async_operation(async_factory, user_id, write),
+            args
+        )
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
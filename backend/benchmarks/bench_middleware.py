@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead of the middleware stack installed by setup_middleware
+
+Drives a trivial GET route directly over ASGI (no HTTP client or socket in
+the loop), first on a bare application and then with the full stack, and
+reports the mean and p50/p99 cost of each plus the difference. The global
+rate limiter is swapped for one with an unreachable limit so every request
+still pays for its decision without being refused, and the access log is
+written to os.devnull.
+
+Usage: python -m benchmarks.bench_middleware [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from benchmarks.common import percentile
+from app.core.access_log import access_logger
+from app.core.config import settings
+import app.middleware.rate_limiter as rate_limiter_module
+from app.middleware import setup_middleware
+from app.middleware.rate_limit_backends import MemoryBackend
+
+def build_app(with_middleware: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("pong")
+
+    if with_middleware:
+        setup_middleware(app, settings)
+    return app
+
+async def drive(app, requests: int) -> list:
+    """Send requests GETs to /ping and return per-request latencies in seconds"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await app(dict(scope), receive, send)
+        latencies.append(time.perf_counter() - started)
+    assert set(statuses) == {200}, set(statuses)
+    return latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    rate_limiter_module.rate_limiter = rate_limiter_module.RateLimiter(
+        10 ** 9, 60, name="bench", backend=MemoryBackend()
+    )
+    access_logger.path = os.devnull
+
+    results = {}
+    for label, with_middleware in (("bare", False), ("middleware", True)):
+        app = build_app(with_middleware)
+        await drive(app, min(1000, args.requests))  # warm up
+        latencies = await drive(app, args.requests)
+        mean = sum(latencies) / len(latencies) * 1e6
+        results[label] = mean
+        print(f"   {label:<10}: {mean:7.1f} µs/request  "
+              f"p50 {percentile(latencies, 50):6.3f} ms  p99 {percentile(latencies, 99):6.3f} ms")
+
+    print(f"   overhead  : {results['middleware'] - results['bare']:7.1f} µs/request")
+    access_logger.stop()
+    print(f"   access log: {access_logger.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
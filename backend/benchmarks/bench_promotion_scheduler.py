@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Promotion scheduling cost for --targets (bot, target) pairs
+
+Compares the central PromotionScheduler against the previous design of one
+asyncio task per bot looping over its targets with sleeps: memory and time
+to set up every campaign, then, for the scheduler only, dispatch throughput
+and lag with a no-op sender over --seconds, and the cost of an in-place
+settings update per bot. Every target comes due in the same instant each
+--interval, so the lag is mostly the time one burst of --targets sends takes
+to drain through the worker pool.
+
+Usage: python -m benchmarks.bench_promotion_scheduler [--targets 100000] [--bots 10000]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.promotion_scheduler import PromotionScheduler
+
+def campaign(bot_id: int, per_bot: int, interval: float, shift: int = 0) -> dict:
+    return {
+        "enabled": True,
+        "message_template": "Join us!",
+        "target_groups": [f"@group_{bot_id}_{index + shift}" for index in range(per_bot)],
+        "interval": interval
+    }
+
+async def noop_send(bot_id: int, target: str, message: str) -> bool:
+    return True
+
+def timed(setup):
+    started = time.perf_counter()
+    result = setup()
+    return result, time.perf_counter() - started
+
+async def traced(setup):
+    """Bytes still allocated by setup() once every task it created has started"""
+    gc.collect()
+    tracemalloc.start()
+    result = setup()
+    await asyncio.sleep(0)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, allocated
+
+async def bench_per_bot_tasks(bots: int, per_bot: int) -> None:
+    async def promotion_loop(targets):
+        while True:
+            for target in targets:
+                await noop_send(0, target, "Join us!")
+                await asyncio.sleep(5)
+            await asyncio.sleep(3600)
+
+    def setup():
+        return [
+            asyncio.create_task(promotion_loop(campaign(bot_id, per_bot, 3600)["target_groups"]))
+            for bot_id in range(bots)
+        ]
+
+    tasks, elapsed = timed(setup)
+    await asyncio.sleep(0)  # Let every task reach its first timer
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    tasks, allocated = await traced(setup)
+    print(f"   per-bot tasks : setup {elapsed * 1000:8.1f} ms  {allocated / 1024 / 1024:7.1f} MiB  "
+          f"{len(tasks):,} tasks, {len(tasks):,} timers")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def bench_scheduler(bots: int, per_bot: int, workers: int, interval: float, seconds: float) -> None:
+    lags = []
+    steady_after = None
+
+    async def send(bot_id: int, target: str, message: str) -> bool:
+        # The first round is one burst of every target; only later rounds show scheduling lag
+        if time.perf_counter() >= steady_after:
+            lags.append(scheduler.lag)
+        return True
+
+    def setup(scheduler):
+        for bot_id in range(bots):
+            scheduler.schedule(bot_id, campaign(bot_id, per_bot, interval))
+
+    idle = PromotionScheduler(noop_send, workers=workers, spacing_seconds=0)
+    _, allocated = await traced(lambda: setup(idle))
+    await idle.stop()
+    del idle
+
+    scheduler = PromotionScheduler(send, workers=workers, spacing_seconds=0)
+    steady_after = time.perf_counter() + interval
+    _, elapsed = timed(lambda: setup(scheduler))
+    print(f"   scheduler     : setup {elapsed * 1000:8.1f} ms  {allocated / 1024 / 1024:7.1f} MiB  "
+          f"{scheduler.live:,} targets, {1 + workers} tasks, 1 timer")
+
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - started
+    lags.sort()
+    p50 = lags[len(lags) // 2] if lags else 0
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0
+    print(f"   dispatch      : {scheduler.sent:,} sends in {elapsed:.1f}s ({scheduler.sent / elapsed:,.0f}/s), "
+          f"steady-state lag p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    for bot_id in range(bots):
+        scheduler.schedule(bot_id, campaign(bot_id, per_bot, interval, shift=1))
+    elapsed = time.perf_counter() - started
+    print(f"   update        : {bots:,} campaigns changed in place in {elapsed * 1000:.1f} ms "
+          f"({elapsed / bots * 1e6:.1f} µs/bot), heap {len(scheduler.heap):,} entries")
+    await scheduler.stop()
+
+async def run(args) -> None:
+    per_bot = max(1, args.targets // args.bots)
+    print(f"{args.bots:,} bots x {per_bot} targets = {args.bots * per_bot:,} targets")
+    await bench_per_bot_tasks(args.bots, per_bot)
+    await bench_scheduler(args.bots, per_bot, args.workers, args.interval, args.seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=100_000)
+    parser.add_argument("--bots", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between sends to one target")
+    parser.add_argument("--seconds", type=float, default=5.0, help="how long to run the dispatcher")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
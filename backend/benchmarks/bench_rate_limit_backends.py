@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Rate limit accuracy and cost across worker processes, per backend
+
+Starts --workers processes that each send --hits requests for the same client
+through a limiter allowing --limit requests per hour, then reports how many
+were allowed in total (accurate means exactly --limit) and the mean cost of
+one decision.
+
+Usage: python -m benchmarks.bench_rate_limit_backends [--workers 4] [--limit 500]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.middleware.rate_limit_backends import MemoryBackend, SQLiteBackend
+from app.middleware.rate_limiter import RateLimiter
+
+def worker(backend_name: str, path: str, limit: int, hits: int, start, results):
+    backend = SQLiteBackend(path) if backend_name == "sqlite" else MemoryBackend()
+    limiter = RateLimiter(limit, 3600, name="bench", backend=backend)
+    start.wait()
+    started = time.perf_counter()
+    allowed = sum(limiter.is_allowed("203.0.113.7") for _ in range(hits))
+    results.put((allowed, (time.perf_counter() - started) / hits * 1e6))
+
+def run(backend_name: str, path: str, workers: int, limit: int, hits: int) -> tuple:
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(backend_name, path, limit, hits, start, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    outcomes = [results.get(timeout=300) for _ in processes]
+    for process in processes:
+        process.join()
+    allowed = sum(outcome[0] for outcome in outcomes)
+    cost = sum(outcome[1] for outcome in outcomes) / workers
+    return allowed, cost
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--hits", type=int, default=5000, help="requests per worker")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.hits:,} requests, limit {args.limit}/hour for one client")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend_name in ("memory", "sqlite"):
+            allowed, cost = run(backend_name, f"{directory}/ratelimit.db", args.workers, args.limit, args.hits)
+            marker = "✅" if allowed == args.limit else "❌"
+            print(f"   {marker} {backend_name:<6}: allowed {allowed:>6,} (expected {args.limit:,})  {cost:6.2f} µs/decision")
+
+if __name__ == "__main__":
+    main()
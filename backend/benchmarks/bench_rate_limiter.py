@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Rate limiter memory and throughput with a million distinct client IPs
+
+Compares the GCRA limiter against the previous sliding-window design (a deque
+of timestamps per key in a defaultdict, reproduced below) by sending one
+request from each of --ips distinct addresses, then --repeat requests from a
+small hot set. Reports time per hit, traced memory and keys retained.
+
+Usage: python -m benchmarks.bench_rate_limiter [--ips 1000000] [--max-keys 100000]
+"""
+
+import argparse
+import gc
+import ipaddress
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.middleware.rate_limit_backends import MemoryBackend
+from app.middleware.rate_limiter import RateLimiter
+
+class DequeRateLimiter:
+    """The sliding-window limiter this module replaced"""
+    def __init__(self, max_requests: int, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.requests = defaultdict(deque)
+
+    def is_allowed(self, identifier: str) -> bool:
+        now = time.time()
+        window_start = now - self.window_seconds
+        while self.requests[identifier] and self.requests[identifier][0] < window_start:
+            self.requests[identifier].popleft()
+        if len(self.requests[identifier]) < self.max_requests:
+            self.requests[identifier].append(now)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+def client_ips(count: int) -> list:
+    base = int(ipaddress.IPv4Address("10.0.0.0"))
+    return [str(ipaddress.IPv4Address(base + index)) for index in range(count)]
+
+def drive(limiter, ips: list, repeat: int) -> None:
+    for ip in ips:
+        limiter.is_allowed(ip)
+    hot = ips[:100]
+    for index in range(repeat):
+        limiter.is_allowed(hot[index % 100])
+
+def run(make_limiter, ips: list, repeat: int) -> tuple:
+    """Return (µs per hit, peak traced MiB, keys retained), timing and tracing separate runs"""
+    limiter = make_limiter()
+    gc.collect()
+    started = time.perf_counter()
+    drive(limiter, ips, repeat)
+    cost = (time.perf_counter() - started) / (len(ips) + repeat) * 1e6
+    keys = len(getattr(limiter, "backend", limiter))
+    del limiter
+
+    limiter = make_limiter()
+    gc.collect()
+    tracemalloc.start()
+    drive(limiter, ips, repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cost, peak / 2**20, keys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=200_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100, help="requests per 60 s window")
+    args = parser.parse_args()
+
+    ips = client_ips(args.ips)
+    print(f"{args.ips:,} distinct IPs + {args.repeat:,} hits from 100 hot IPs, limit {args.limit}/min")
+
+    cost, peak, keys = run(lambda: DequeRateLimiter(args.limit), ips, args.repeat)
+    print(f"   deque window : {cost:6.2f} µs/hit  peak {peak:8.1f} MiB  keys retained {keys:>9,}")
+
+    # Short sweep interval so idle keys are reclaimed within the run
+    cost, peak, keys = run(
+        lambda: RateLimiter(args.limit, 60, backend=MemoryBackend(max_keys=args.max_keys, sweep_interval=1)),
+        ips, args.repeat
+    )
+    print(f"   GCRA         : {cost:6.2f} µs/hit  peak {peak:8.1f} MiB  keys retained {keys:>9,}"
+          f"  (max_keys={args.max_keys:,})")
+
+if __name__ == "__main__":
+    main()
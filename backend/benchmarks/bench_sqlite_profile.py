@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SQLite profile concurrency benchmark
+
+Drives the real API routers in-process with a mix of GET /bots/bots reads and
+POST /auth/telegram logins (user upsert + session insert), once against an
+engine with SQLite defaults (rollback journal, no busy timeout, default pool)
+and once against the tuned profile from app.core.database.
+
+Usage: python -m benchmarks.bench_sqlite_profile [--concurrency 64] [--requests 3000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.common import bearer, build_api_app, percentile, seed_fleet, telegram_auth_data
+from app.core.config import settings
+from app.core.database import create_async_database_engine, get_async_database_url
+
+async def run_phase(name: str, async_engine, tokens: list, args):
+    app = build_api_app(async_engine)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    counter = iter(range(args.requests))
+    login_ids = iter(range(10_000_000, 20_000_000))
+    login_every = max(1, round(1 / args.write_ratio)) if args.write_ratio else 0
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as client:
+        async def worker():
+            for index in counter:
+                if login_every and index % login_every == 0:
+                    kind = "login"
+                    request = client.post(
+                        f"{settings.API_V1_STR}/auth/telegram",
+                        json={"auth_data": telegram_auth_data(next(login_ids))}
+                    )
+                else:
+                    kind = "list_bots"
+                    request = client.get(
+                        f"{settings.API_V1_STR}/bots/bots",
+                        headers=bearer(tokens[index % len(tokens)])
+                    )
+                started = time.perf_counter()
+                response = await request
+                latencies[kind].append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors[kind] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    await async_engine.dispose()
+
+    print(f"\n{name}")
+    print(f"   throughput : {args.requests / elapsed:,.0f} req/s")
+    for kind in ("list_bots", "login"):
+        samples = latencies[kind]
+        print(f"   {kind:<10} : n={len(samples):<6} p50={percentile(samples, 50):8.2f} ms"
+              f"  p99={percentile(samples, 99):8.2f} ms  errors={errors[kind]}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--bots-per-user", type=int, default=25)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        default_url = f"sqlite:///{directory}/default.db"
+        tuned_url = f"sqlite:///{directory}/tuned.db"
+        default_tokens = seed_fleet(default_url, args.users, args.bots_per_user)
+        tuned_tokens = seed_fleet(tuned_url, args.users, args.bots_per_user)
+
+        await run_phase(
+            "SQLite defaults (rollback journal, default pool)",
+            create_async_engine(get_async_database_url(default_url)),
+            default_tokens,
+            args
+        )
+        await run_phase(
+            f"Tuned profile (journal_mode={settings.SQLITE_JOURNAL_MODE}, synchronous={settings.SQLITE_SYNCHRONOUS}, "
+            f"pool={settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW})",
+            create_async_database_engine(tuned_url),
+            tuned_tokens,
+            args
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
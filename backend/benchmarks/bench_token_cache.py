@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Auth overhead microbenchmark with the decoded-JWT cache on and off
+
+1. verify_token() alone over a rotating set of live bearer tokens
+2. sequential GET /users/me requests, i.e. the whole authentication
+   dependency chain as the dashboard hits it
+
+Usage: python -m benchmarks.bench_token_cache [--calls 200000] [--tokens 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.common import bearer, build_api_app, percentile, seed_fleet
+from app.core.config import settings
+from app.core.database import create_async_database_engine
+from app.core.security import create_access_token, token_cache, verify_token
+
+def bench_verify_token(tokens: list, calls: int) -> float:
+    """Return the mean cost of one verify_token call in microseconds"""
+    token_count = len(tokens)
+    started = time.perf_counter()
+    for index in range(calls):
+        verify_token(tokens[index % token_count])
+    return (time.perf_counter() - started) / calls * 1e6
+
+async def bench_requests(url: str, tokens: list, requests: int) -> list:
+    async_engine = create_async_database_engine(url)
+    transport = httpx.ASGITransport(app=build_api_app(async_engine))
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        for index in range(requests):
+            started = time.perf_counter()
+            response = await client.get(f"{settings.API_V1_STR}/users/me", headers=bearer(tokens[index % len(tokens)]))
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+    await async_engine.dispose()
+    return latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token({"sub": str(index + 1)}, expires_delta=timedelta(hours=1))
+        for index in range(args.tokens)
+    ]
+
+    print(f"verify_token over {args.tokens} live tokens, {args.calls:,} calls")
+    for enabled in (False, True):
+        settings.TOKEN_CACHE_ENABLED = enabled
+        token_cache.clear()
+        cost = bench_verify_token(tokens, args.calls)
+        print(f"   cache {'on ' if enabled else 'off'}: {cost:7.2f} µs/call"
+              + (f"  (hits={token_cache.hits:,} misses={token_cache.misses:,})" if enabled else ""))
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{directory}/bench.db"
+        user_tokens = seed_fleet(url, users=args.tokens, bots_per_user=1)
+
+        print(f"\nGET /users/me, {args.requests:,} sequential requests")
+        for enabled in (False, True):
+            settings.TOKEN_CACHE_ENABLED = enabled
+            token_cache.clear()
+            latencies = await bench_requests(url, user_tokens, args.requests)
+            print(f"   cache {'on ' if enabled else 'off'}: p50={percentile(latencies, 50):.3f} ms"
+                  f"  p99={percentile(latencies, 99):.3f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the API routers
+
+Exercises every router endpoint in-process against a seeded SQLite database,
+captures each statement the routers send through SQLAlchemy, and runs
+EXPLAIN QUERY PLAN on it with the same parameters. Exits non-zero if any
+statement falls back to a full table scan on a table that is not in
+ALLOWED_FULL_SCANS.
+
+Usage: python -m benchmarks.check_query_plans [--verbose]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import bearer, build_api_app, seed_fleet, telegram_auth_data
+from app.core.config import settings
+from app.core.database import create_async_database_engine
+from app.models import Payment, PricingPlan, Subscription
+
+# Small reference tables that are expected to be read in full
+ALLOWED_FULL_SCANS = {"pricing_plans"}
+
+def full_scan_table(detail: str):
+    """
+    Table read in full by one EXPLAIN QUERY PLAN detail line, or None
+    Handles both "SCAN bots" (SQLite >= 3.36) and "SCAN TABLE bots"; index
+    scans, subqueries and constant rows are not full table scans.
+    """
+    words = detail.split()
+    if words[:1] != ["SCAN"]:
+        return None
+    words = words[2:] if words[1:2] == ["TABLE"] else words[1:]
+    if not words or words[:2] == ["CONSTANT", "ROW"] or "USING" in words:
+        return None
+    return words[0] if re.fullmatch(r"\w+", words[0]) else None
+
+def seed_billing(url: str):
+    """Add plans, an active subscription and a payment history for the first user"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    with sessionmaker(bind=engine)() as db:
+        plan = PricingPlan(name="Pro", price=25, features=["5 Userbot Slots"], max_bots=5)
+        db.add_all([plan, PricingPlan(name="Starter", price=10, features=["1 Userbot Slot"])])
+        db.flush()
+        subscription = Subscription(user_id=1, plan_id=plan.id, status="active", payment_method="crypto")
+        db.add(subscription)
+        db.flush()
+        for index in range(20):
+            db.add(Payment(
+                subscription_id=subscription.id,
+                user_id=1,
+                amount=plan.price,
+                payment_method="crypto",
+                transaction_id=f"SEED_{index}"
+            ))
+        db.commit()
+    engine.dispose()
+
+async def exercise_routes(client: httpx.AsyncClient, token: str):
+    """Call every endpoint that does not need a live Telegram connection"""
+    api = settings.API_V1_STR
+    headers = bearer(token)
+    login = await client.post(f"{api}/auth/telegram", json={"auth_data": telegram_auth_data(900001)})
+    login_token = login.json().get("token", {}).get("access_token", "")
+
+    calls = [
+        ("GET", "/users/me", None),
+        ("GET", "/users/profile", None),
+        ("PUT", "/users/profile", {"last_name": "Checked"}),
+        ("GET", "/bots/bots", None),
+        ("GET", "/bots/bots?limit=3&include_total=true", None),
+        ("GET", "/bots/bots?status=online&limit=2&include_total=true", None),
+        ("GET", "/bots/bots/1", None),
+        ("PUT", "/bots/bots/2", {"name": "renamed bot"}),
+        ("POST", "/bots/bots/2/start", None),
+        ("POST", "/bots/bots/2/stop", None),
+        ("POST", "/bots/bots/2/test-message?target=me&message=hi", None),
+        ("DELETE", "/bots/bots/3", None),
+        ("GET", "/subscriptions/plans", None),
+        ("GET", "/subscriptions/current", None),
+        ("GET", "/dashboard?limit=3", None),
+        ("GET", "/subscriptions/payments", None),
+        ("GET", "/subscriptions/payments?limit=5&include_total=true", None),
+        ("POST", "/subscriptions/payments/verify?payment_id=1", None),
+        ("POST", "/subscriptions/subscribe", {"plan_id": 1, "payment_method": "crypto"}),
+        ("POST", "/subscriptions/cancel", None),
+    ]
+    for method, path, body in calls:
+        response = await client.request(method, f"{api}{path}", headers=headers, json=body)
+        # Follow one page further so the keyset predicate is planned as well
+        next_cursor = response.json().get("next_cursor") if method == "GET" and response.status_code == 200 else None
+        if next_cursor:
+            separator = "&" if "?" in path else "?"
+            await client.get(f"{api}{path}{separator}cursor={next_cursor}", headers=headers)
+
+    await client.post(f"{api}/auth/refresh-token", params={"current_token": login_token})
+    await client.post(f"{api}/auth/logout", json={"token": login_token})
+    await client.delete(f"{api}/users/profile", headers=bearer(token))
+
+async def capture_statements(url: str, token: str) -> list:
+    async_engine = create_async_database_engine(url)
+    statements = []
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    transport = httpx.ASGITransport(app=build_api_app(async_engine), raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        await exercise_routes(client, token)
+    await async_engine.dispose()
+    return statements
+
+def check_plans(url: str, statements: list, verbose: bool) -> list:
+    """Run EXPLAIN QUERY PLAN for every distinct statement and return the offenders"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    failures = []
+    seen = set()
+    with engine.connect() as connection:
+        raw = connection.connection.driver_connection
+        for statement, parameters in statements:
+            if statement in seen or statement.lstrip().upper().startswith(("PRAGMA", "INSERT")):
+                continue
+            seen.add(statement)
+            plan = [row[3] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = [
+                table for table in map(full_scan_table, plan)
+                if table is not None and table not in ALLOWED_FULL_SCANS
+            ]
+            if scans:
+                failures.append((statement, plan))
+            if verbose or scans:
+                marker = "❌" if scans else "✅"
+                print(f"{marker} {' '.join(statement.split())[:140]}")
+                for line in plan:
+                    print(f"      {line}")
+    engine.dispose()
+    return failures
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="print the plan of every statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{directory}/plans.db"
+        tokens = seed_fleet(url, users=50, bots_per_user=10)
+        seed_billing(url)
+        statements = await capture_statements(url, tokens[0])
+        failures = check_plans(url, statements, args.verbose)
+
+    print(f"\n{len({statement for statement, _ in statements})} distinct statements checked")
+    if failures:
+        print(f"❌ {len(failures)} statement(s) fall back to a full table scan")
+        sys.exit(1)
+    print("✅ No full table scans outside of reference tables")
+
+if __name__ == "__main__":
+    asyncio.run(main())
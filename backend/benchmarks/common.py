@@ -0,0 +1,94 @@
+"""
+Shared helpers for the benchmark and plan-check scripts
+"""
+
+import hashlib
+import hmac
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark-token")
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.api import api_router
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.security import create_access_token
+from app.middleware.rate_limiter import auth_rate_limiter, api_rate_limiter, user_rate_limiter
+from app.models import Bot, User
+
+def percentile(samples, pct):
+    """Return the pct percentile of samples (seconds) in milliseconds"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+def telegram_auth_data(telegram_id: int, **fields) -> dict:
+    """Build login widget data signed with the configured bot token"""
+    data = {
+        "id": telegram_id,
+        "first_name": "Bench",
+        "username": f"bench{telegram_id}",
+        "auth_date": int(time.time()),
+        **fields
+    }
+    check_string = "\n".join(f"{key}={value}" for key, value in sorted(data.items()))
+    secret_key = hashlib.sha256(settings.TELEGRAM_BOT_TOKEN.encode()).digest()
+    data["hash"] = hmac.new(secret_key, check_string.encode(), hashlib.sha256).hexdigest()
+    return data
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+def seed_fleet(url: str, users: int, bots_per_user: int, session_string_size: int = 400) -> list:
+    """Create the schema, a fleet of bots and return one bearer token per user"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        for user_index in range(users):
+            user = User(telegram_id=f"seed{user_index}", username=f"seed{user_index}", first_name="Bench")
+            db.add(user)
+            db.flush()
+            for bot_index in range(bots_per_user):
+                db.add(Bot(
+                    user_id=user.id,
+                    name=f"bot-{user_index}-{bot_index}",
+                    phone_number=f"+{user_index:05d}{bot_index:05d}",
+                    session_string="x" * session_string_size,
+                    status="online" if bot_index % 3 == 0 else "offline"
+                ))
+        db.commit()
+        user_ids = [user.id for user in db.query(User).order_by(User.id).all()]
+    engine.dispose()
+    return [
+        create_access_token({"sub": str(user_id)}, expires_delta=timedelta(hours=1))
+        for user_id in user_ids
+    ]
+
+def build_api_app(async_engine) -> FastAPI:
+    """
+    Bare application with only the API routers, bound to the given engine
+    Rate limiters are disabled so a single client can generate load
+    """
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[auth_rate_limiter] = lambda: None
+    app.dependency_overrides[api_rate_limiter] = lambda: None
+    app.dependency_overrides[user_rate_limiter] = lambda: None
+    return app
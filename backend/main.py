@@ -1,12 +1,19 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import uvicorn
 
+from app.core.access_log import access_logger
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base
+from app.core.metrics import metrics
 from app.middleware import setup_middleware
 from app.api import api_router
+from app.services.bot_counters import bot_counter_reconciler
+from app.services.bot_shards import shard_client
+from app.services.fleet_resume import fleet_resumer
+from app.services.session_pruner import session_pruner
+from app.services.telethon_service import telethon_service
 
 # Create database tables
 def create_tables():
@@ -18,11 +25,32 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print("🚀 Starting Sentinel Ubot Backend...")
+    if settings.WORKERS > 1 and not settings.TELETHON_SHARDS:
+        # In-process clients would be connected once per worker
+        raise RuntimeError("WORKERS > 1 requires TELETHON_SHARDS > 0 (see app.services.bot_shards)")
     create_tables()
     print("✅ Database tables created")
+    if settings.SESSION_PRUNE_ENABLED:
+        session_pruner.start()
+    if settings.BOT_COUNTER_RECONCILE_ENABLED:
+        bot_counter_reconciler.start()
+    # With TELETHON_SHARDS the bot_shards workers own the clients instead
+    if settings.TELETHON_AUTO_RESUME and not settings.TELETHON_SHARDS:
+        fleet_resumer.start()
+    if settings.TELETHON_SUPERVISOR_ENABLED and not settings.TELETHON_SHARDS:
+        telethon_service.supervisor.start()
     yield
     # Shutdown
     print("🛑 Shutting down Sentinel Ubot Backend...")
+    await fleet_resumer.stop()
+    await telethon_service.supervisor.stop()
+    await telethon_service.promotions.stop()
+    await session_pruner.stop()
+    await bot_counter_reconciler.stop()
+    await telethon_service.pending_logins.close()
+    await shard_client.close()
+    await async_engine.dispose()
+    access_logger.stop()
 
 # Create FastAPI application
 app = FastAPI(
@@ -50,6 +78,13 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Metrics endpoint (restricted to whitelisted IPs by IPWhitelistMiddleware)
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Prometheus text exposition of the process metrics"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -26,6 +26,32 @@ except Exception as e:
     print(f'Initial data creation failed or already exists: {e}')
 "
 
-# Start the application
+# In-process userbots can only live in one API worker
+if [ "${WORKERS:-1}" -gt 1 ] && [ "${TELETHON_SHARDS:-0}" -eq 0 ]; then
+    echo "WORKERS > 1 requires TELETHON_SHARDS > 0, refusing to start"
+    exit 1
+fi
+
+# Start the application (WORKERS > 1 also needs RATE_LIMIT_BACKEND=sqlite so limits stay shared)
+if [ "${TELETHON_SHARDS:-0}" -eq 0 ]; then
+    echo "Starting FastAPI server..."
+    exec python -m uvicorn main:app --host ${HOST:-0.0.0.0} --port ${PORT:-8000} --workers ${WORKERS:-1}
+fi
+
+# Sharded runtime: the shard supervisor (which respawns crashed shards) runs
+# beside uvicorn. Stop signals go to both, and whichever exits first takes the
+# other down so the panel restarts the server as a whole.
+echo "Starting ${TELETHON_SHARDS} userbot shards..."
+python -m app.services.bot_shards --shards ${TELETHON_SHARDS} &
+SHARDS_PID=$!
+
 echo "Starting FastAPI server..."
-exec python -m uvicorn main:app --host ${HOST:-0.0.0.0} --port ${PORT:-8000} --workers 1
+python -m uvicorn main:app --host ${HOST:-0.0.0.0} --port ${PORT:-8000} --workers ${WORKERS:-1} &
+API_PID=$!
+
+trap 'kill -TERM $API_PID $SHARDS_PID 2>/dev/null' TERM INT
+wait -n
+STATUS=$?
+kill -TERM $API_PID $SHARDS_PID 2>/dev/null
+wait $API_PID $SHARDS_PID
+exit $STATUS
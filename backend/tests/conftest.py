@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:test-token")
+
+import pytest
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run
+
+@pytest.fixture
+def api():
+    """
+    API application bound to a private in-memory database
+    Yields (app, session_factory); rate limiters are disabled.
+    """
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+    from app.api import api_router
+    from app.core.config import settings
+    from app.core.database import Base, get_db
+    from app.middleware.rate_limiter import auth_rate_limiter, api_rate_limiter, user_rate_limiter
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def create_schema():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    asyncio.run(create_schema())
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[auth_rate_limiter] = lambda: None
+    app.dependency_overrides[api_rate_limiter] = lambda: None
+    app.dependency_overrides[user_rate_limiter] = lambda: None
+    yield app, session_factory
+    asyncio.run(engine.dispose())
@@ -0,0 +1,34 @@
+import threading
+import time
+from app.core.access_log import AccessLogger
+
+class StuckLogger(AccessLogger):
+    """Writer thread that never gets to drain its queue"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+    def run(self):
+        self.release.wait()
+
+def test_stop_with_a_full_buffer_and_stuck_writer_returns(caplog):
+    access_log = StuckLogger(buffer_size=1)
+    assert access_log.log({"path": "/"})
+
+    started = time.monotonic()
+    access_log.stop(timeout=0.2)
+    elapsed = time.monotonic() - started
+    access_log.release.set()
+
+    assert elapsed < 1
+    assert "Access log writer is stuck" in caplog.text
+
+def test_stop_flushes_queued_records(tmp_path):
+    path = tmp_path / "access.log"
+    access_log = AccessLogger(path=str(path))
+    for index in range(3):
+        access_log.log({"request": index})
+    access_log.stop(timeout=5)
+
+    assert access_log.written == 3
+    assert len(path.read_text().splitlines()) == 3
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+from sqlalchemy import func, select
+from app.api import auth
+from app.models import User
+from app.schemas.user import UserCreate
+
+def test_login_upsert_falls_back_without_on_conflict(api, run):
+    _, session_factory = api
+    profile = dict(telegram_id="77", username="before", first_name="Fallback")
+
+    async def login(**changes):
+        async with session_factory() as db:
+            user = await auth.upsert_telegram_user(db, UserCreate(**{**profile, **changes}))
+            await db.commit()
+            return user.id, user.username, user.updated_at
+
+    async def scenario():
+        with patch.object(auth, "upsert_insert", lambda dialect_name: None):
+            first = await login()
+            unchanged = await login()
+            renamed = await login(username="after")
+        async with session_factory() as db:
+            rows = await db.scalar(select(func.count()).select_from(User).where(User.telegram_id == "77"))
+        return first, unchanged, renamed, rows
+
+    first, unchanged, renamed, rows = run(scenario())
+
+    assert rows == 1
+    assert first[0] == unchanged[0] == renamed[0]
+    assert unchanged[1:] == first[1:]
+    assert renamed[1] == "after" and renamed[2] >= first[2]
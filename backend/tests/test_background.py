@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.services.background import BackgroundTask, PeriodicTask
+
+class Flaky(PeriodicTask):
+    failure_message = "Flaky tick failed"
+
+    def __init__(self):
+        super().__init__(interval_seconds=0.01)
+        self.ticks = 0
+
+    async def tick(self):
+        self.ticks += 1
+        if self.ticks == 1:
+            raise RuntimeError("first tick fails")
+
+def test_periodic_task_survives_failing_ticks_and_stops(run, caplog):
+    async def scenario():
+        task = Flaky()
+        task.start()
+        first = task.task
+        task.start()  # Already running: no second loop
+        assert task.task is first
+        await asyncio.sleep(0.05)
+        await task.stop()
+        return task, first
+
+    task, first = run(scenario())
+    assert task.ticks >= 2
+    assert task.task is None and first.cancelled()
+    assert "Flaky tick failed: first tick fails" in caplog.text
+
+def test_missing_hooks_fail_at_instantiation():
+    class NoRun(BackgroundTask):
+        pass
+
+    class NoTick(PeriodicTask):
+        pass
+
+    with pytest.raises(TypeError):
+        NoRun()
+    with pytest.raises(TypeError):
+        NoTick(interval_seconds=1)
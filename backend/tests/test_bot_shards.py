@@ -0,0 +1,33 @@
+from app.services.bot_shards import ShardedBotRuntime
+
+class DeadWriter:
+    """Writer of a shard that died after the connection was opened"""
+    def __init__(self, error: OSError):
+        self.error = error
+        self.closed = False
+
+    def write(self, data):
+        raise self.error
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+def test_write_to_a_dead_shard_is_a_shard_error(run):
+    async def scenario():
+        runtime = ShardedBotRuntime(1, timeout=1)
+        connection = runtime.connections[0]
+        outcomes = []
+        for error in (BrokenPipeError("Broken pipe"), ConnectionResetError("Connection reset by peer")):
+            connection.writer = writer = DeadWriter(error)
+            outcomes.append((await runtime.stop_bot(7), writer.closed, connection.writer, dict(connection.pending)))
+        return outcomes
+
+    for stopped, closed, writer, pending in run(scenario()):
+        assert stopped is False
+        assert closed and writer is None and not pending
@@ -0,0 +1,23 @@
+import asyncio
+from app.services.bot_supervisor import BotSupervisor
+
+def test_supervisor_flushes_once_more_on_stop(run):
+    flushes = []
+
+    class Supervisor(BotSupervisor):
+        async def check(self):
+            pass
+
+        async def flush(self):
+            flushes.append(self.task)
+
+    async def scenario():
+        supervisor = Supervisor(None, interval_seconds=60, backoff_base=1, backoff_max=1,
+                                max_attempts=1, connect_timeout=1, concurrency=1)
+        await supervisor.stop()  # Never started: nothing to flush
+        supervisor.start()
+        await asyncio.sleep(0)
+        await supervisor.stop()
+
+    run(scenario())
+    assert len(flushes) == 2 and flushes[-1] is None
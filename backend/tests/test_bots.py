@@ -0,0 +1,32 @@
+from datetime import timedelta
+import httpx
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
+from app.models import User
+
+def test_disabled_user_cannot_reach_bot_endpoints(api, run):
+    app, session_factory = api
+
+    async def scenario():
+        async with session_factory() as db:
+            user = User(telegram_id="43", username="disabled", first_name="Disabled", is_active=False)
+            db.add(user)
+            await db.commit()
+            user_id = user.id
+
+        user_cache.invalidate(user_id)
+        token = create_access_token({"sub": str(user_id)}, expires_delta=timedelta(minutes=5))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                f"{settings.API_V1_STR}/bots/bots",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+        user_cache.invalidate(user_id)
+        return response
+
+    response = run(scenario())
+
+    assert response.status_code == 403, response.text
+    assert response.json()["detail"] == "User account is disabled"
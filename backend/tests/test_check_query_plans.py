@@ -0,0 +1,17 @@
+import pytest
+from benchmarks.check_query_plans import full_scan_table
+
+@pytest.mark.parametrize("detail, table", [
+    ("SCAN bots", "bots"),
+    ("SCAN TABLE bots", "bots"),
+    ("SCAN TABLE pricing_plans", "pricing_plans"),
+    ("SCAN bots USING INDEX ix_bots_user_id_created_at", None),
+    ("SCAN bots USING COVERING INDEX ix_bots_user_id_status", None),
+    ("SCAN TABLE bots USING INDEX ix_bots_user_id_created_at", None),
+    ("SCAN TABLE bots USING COVERING INDEX ix_bots_user_id_status", None),
+    ("SEARCH bots USING INDEX ix_bots_user_id_created_at (user_id=?)", None),
+    ("SCAN CONSTANT ROW", None),
+    ("SCAN (subquery-1)", None),
+])
+def test_full_scan_table(detail, table):
+    assert full_scan_table(detail) == table
@@ -0,0 +1,34 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from app.services.fleet_resume import FleetResumer
+
+class FakeService:
+    def __init__(self):
+        self.active_clients = {}
+        self.running = 0
+        self.most_running = 0
+
+    async def start_bot(self, bot):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return True
+
+def test_jitter_does_not_hold_a_connect_slot(run):
+    service = FakeService()
+    resumer = FleetResumer(service, concurrency=1, jitter_seconds=0.2, batch_size=10)
+    bots = [SimpleNamespace(id=bot_id, session_string="session") for bot_id in range(5)]
+
+    async def scenario():
+        semaphore = asyncio.Semaphore(resumer.concurrency)
+        started = time.monotonic()
+        results = await asyncio.gather(*(resumer.resume(bot, semaphore) for bot in bots))
+        return results, time.monotonic() - started
+
+    results, elapsed = run(scenario())
+    assert results == [True] * 5
+    assert service.most_running == 1
+    # Serialized jitter would take up to 5 x 0.2s; overlapping jitter stays near one draw
+    assert elapsed < 0.2 + 5 * 0.01 + 0.1
@@ -0,0 +1,14 @@
+import pytest
+import main
+from app.core.config import settings
+
+def test_lifespan_refuses_several_workers_with_in_process_bots(monkeypatch, run):
+    monkeypatch.setattr(settings, "WORKERS", 2)
+    monkeypatch.setattr(settings, "TELETHON_SHARDS", 0)
+
+    async def start():
+        async with main.lifespan(main.app):
+            pass
+
+    with pytest.raises(RuntimeError, match="TELETHON_SHARDS"):
+        run(start())
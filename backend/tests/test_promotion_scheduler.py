@@ -0,0 +1,81 @@
+import asyncio
+import time
+from app.services.promotion_scheduler import PromotionScheduler
+
+SPACING = 0.1
+
+def campaign(targets, interval=0.0):
+    return {"enabled": True, "message_template": "Join us!", "target_groups": targets, "interval": interval}
+
+def test_sends_of_one_bot_are_serialized_and_spaced(run):
+    sends = {}
+
+    async def send(bot_id, target, message):
+        started = time.monotonic()
+        await asyncio.sleep(SPACING / 2)
+        sends.setdefault(bot_id, []).append((started, time.monotonic()))
+        return True
+
+    async def scenario():
+        scheduler = PromotionScheduler(send, workers=8, spacing_seconds=SPACING)
+        scheduler.schedule(1, campaign(["@a", "@b", "@c"]))
+        scheduler.schedule(2, campaign(["@a", "@b"]))
+        # Added targets come due at once, on top of the ones already spaced out
+        scheduler.schedule(1, campaign(["@a", "@b", "@c", "@d", "@e", "@f"]))
+        await asyncio.sleep(SPACING * 12)
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = run(scenario())
+    assert scheduler.failed == 0
+    assert len(sends[1]) >= 6
+    for windows in sends.values():
+        for (started, _), (next_started, _) in zip(windows, windows[1:]):
+            assert next_started - started >= SPACING * 0.95
+        for (_, finished), (next_started, _) in zip(windows, windows[1:]):
+            assert next_started >= finished
+    # Different bots still send concurrently
+    assert abs(sends[1][0][0] - sends[2][0][0]) < SPACING / 2
+
+def test_backlogged_queue_does_not_squeeze_the_gap(run):
+    starts = []
+
+    async def send(bot_id, target, message):
+        starts.append(time.monotonic())
+        return True
+
+    async def scenario():
+        scheduler = PromotionScheduler(send, workers=4, spacing_seconds=SPACING)
+        scheduler.start()
+        # Items queued back to back, as a backlog behind slow workers leaves them
+        for target in ("@a", "@b", "@c"):
+            await scheduler.queue.put((1, target, "Join us!"))
+        await scheduler.queue.join()
+        await scheduler.stop()
+
+    run(scenario())
+    assert len(starts) == 3
+    for started, next_started in zip(starts, starts[1:]):
+        assert next_started - started >= SPACING * 0.95
+
+def test_only_real_sends_are_counted(run):
+    from app.services.telethon_service import TelethonService
+
+    class Client:
+        async def send_message(self, target, message):
+            pass
+
+    async def scenario():
+        service = TelethonService()
+        service.active_clients[1] = Client()
+        scheduler = PromotionScheduler(service.send_promotion, workers=2, spacing_seconds=0)
+        scheduler.start()
+        await scheduler.queue.put((1, "@a", "Join us!"))
+        # Bot 2 was stopped after its send was queued
+        await scheduler.queue.put((2, "@a", "Join us!"))
+        await scheduler.queue.join()
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = run(scenario())
+    assert (scheduler.sent, scheduler.skipped, scheduler.failed) == (1, 1, 0)
@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+from app.middleware.rate_limit_backends import MemoryBackend, SQLiteBackend
+from app.middleware.rate_limiter import RateLimiter
+
+def test_memory_and_sqlite_make_the_same_decisions(tmp_path):
+    memory = RateLimiter(5, 60, name="t", backend=MemoryBackend())
+    shared = RateLimiter(5, 60, name="t", backend=SQLiteBackend(str(tmp_path / "limits.db")))
+
+    now = 1000.0
+    for step in range(40):
+        now += 3.5
+        assert memory.consume("client", now)[0] == shared.consume("client", now)[0], step
+
+def test_locked_sqlite_store_fails_open(tmp_path):
+    path = str(tmp_path / "limits.db")
+    backend = SQLiteBackend(path, busy_timeout=0.05)
+    limiter = RateLimiter(1, 60, name="t", backend=backend)
+    limiter.hit("client")
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.monotonic()
+        result = limiter.hit("client")
+        elapsed = time.monotonic() - started
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+
+    assert result.allowed
+    assert elapsed < 1
+
+def test_blocking_backend_runs_off_the_event_loop(tmp_path, run):
+    class RecordingBackend(SQLiteBackend):
+        def update(self, *args):
+            self.thread = threading.get_ident()
+            return super().update(*args)
+
+    backend = RecordingBackend(str(tmp_path / "limits.db"))
+    limiter = RateLimiter(5, 60, name="t", backend=backend)
+
+    result = run(limiter.hit_async("client"))
+
+    assert result.allowed
+    assert backend.thread != threading.get_ident()
+
+def test_rejections_are_counted_on_the_event_loop(tmp_path, run):
+    calls = []
+
+    class RecordingCounter:
+        def inc(self, *label_values):
+            calls.append((label_values, threading.get_ident()))
+
+    limiter = RateLimiter(1, 60, name="t-count", backend=SQLiteBackend(str(tmp_path / "limits.db")))
+
+    async def scenario():
+        return [await limiter.hit_async("client") for _ in range(3)]
+
+    with patch("app.middleware.rate_limiter.rate_limit_rejections", RecordingCounter()):
+        results = run(scenario())
+
+    assert [result.allowed for result in results] == [True, False, False]
+    assert calls == [(("t-count",), threading.get_ident())] * 2
@@ -0,0 +1,82 @@
+import pytest
+from telethon.errors import FloodWaitError, PasswordHashInvalidError
+from app.services.telethon_service import TelethonService
+
+class FakeClient:
+    """Stands in for TelegramClient; failures are injected per method"""
+    def __init__(self, fail=None):
+        self.fail = fail or {}
+        self.connected = False
+        self.disconnects = 0
+
+    async def connect(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def disconnect(self):
+        self.connected = False
+        self.disconnects += 1
+
+    async def is_user_authorized(self):
+        return False
+
+    async def send_code_request(self, phone_number):
+        raise self.fail["send_code_request"]
+
+    async def sign_in(self, *args, **kwargs):
+        raise self.fail["sign_in"]
+
+@pytest.fixture
+def service(monkeypatch):
+    service = TelethonService()
+    service.created = []
+
+    async def create_client(bot_id, api_id, api_hash, session_string=None, proxy_config=None):
+        client = FakeClient(service.next_failures)
+        service.created.append(client)
+        return client
+
+    service.next_failures = {}
+    monkeypatch.setattr(service, "create_client", create_client)
+    return service
+
+def test_failed_code_request_disconnects_fresh_client(service, run):
+    service.next_failures = {"send_code_request": FloodWaitError(request=None, capture=30)}
+
+    result = run(service.authenticate_bot(0, "+100", "1", "hash", user_id=1))
+
+    assert result["status"] == "error"
+    assert len(service.pending_logins) == 0
+    assert not service.created[0].connected
+
+def test_failed_password_disconnects_fresh_client(service, run):
+    service.next_failures = {"sign_in": RuntimeError("network down")}
+
+    result = run(service.verify_password(7, "1", "hash", "secret", phone_number="+100", user_id=1))
+
+    assert result["status"] == "error"
+    assert len(service.pending_logins) == 0
+    assert not service.created[0].connected
+
+def test_wrong_password_keeps_client_for_retry(service, run):
+    service.next_failures = {"sign_in": PasswordHashInvalidError(request=None)}
+
+    result = run(service.verify_password(7, "1", "hash", "wrong", phone_number="+100", user_id=1))
+
+    assert result["status"] == "invalid_password"
+    assert len(service.pending_logins) == 1
+    assert service.created[0].connected
+
+def test_same_number_from_two_users_keeps_both_clients(service, run):
+    async def scenario():
+        first = await service.login_client((1, "+100"), 0, "1", "hash")
+        second = await service.login_client((2, "+100"), 0, "1", "hash")
+        return first, second, await service.pending_logins.get((1, "+100"))
+
+    first, second, pending = run(scenario())
+
+    assert first is not second
+    assert pending is first
+    assert first.connected and second.connected
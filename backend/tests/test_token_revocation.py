@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+import pytest
+from jose import jwt
+from app.core import security
+from app.core.config import settings
+from app.core.token_cache import TokenCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(max_size=2)
+    monkeypatch.setattr(security, "token_cache", cache)
+    return cache
+
+def forged_token(index: int) -> str:
+    claims = {"sub": "1", "jti": f"forged{index}", "exp": time.time() + 3600}
+    return jwt.encode(claims, "not-the-secret", algorithm=settings.ALGORITHM)
+
+def test_forged_tokens_cannot_evict_a_revocation(cache):
+    token = security.create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=5))
+    assert security.verify_token(token) is not None
+
+    security.revoke_token(token)
+    for index in range(100):
+        security.revoke_token(forged_token(index))
+
+    assert security.verify_token(token) is None
+    assert len(cache._revoked) == 1
+
+def test_revocations_are_dropped_once_the_token_expires(cache):
+    cache.revoke("token", "jti-1", time.time() + 0.05)
+    assert cache.is_revoked("jti-1")
+
+    time.sleep(0.1)
+
+    assert not cache.is_revoked("jti-1")
+    assert cache._revoked == {}
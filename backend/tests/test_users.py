@@ -0,0 +1,48 @@
+from datetime import timedelta
+import httpx
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.quota_cache import quota_cache
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
+from app.models import Payment, PricingPlan, Subscription, User
+
+def test_delete_account_removes_subscription_and_invalidates_caches(api, run):
+    app, session_factory = api
+
+    async def scenario():
+        async with session_factory() as db:
+            user = User(telegram_id="42", username="doomed", first_name="Doomed")
+            plan = PricingPlan(name="Pro", price=10, max_bots=5, rate_limit_per_minute=300)
+            db.add_all([user, plan])
+            await db.flush()
+            subscription = Subscription(user_id=user.id, plan_id=plan.id, status="active")
+            db.add(subscription)
+            await db.flush()
+            db.add(Payment(subscription_id=subscription.id, user_id=user.id, amount=10, status="completed"))
+            await db.commit()
+            user_id = user.id
+
+        token = create_access_token({"sub": str(user_id)}, expires_delta=timedelta(minutes=5))
+        quota_cache.put(user_id, 300)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.delete(
+                f"{settings.API_V1_STR}/users/profile",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+        async with session_factory() as db:
+            remaining = await db.scalar(select(User).where(User.id == user_id))
+            subscriptions = (await db.scalars(select(Subscription.id).where(Subscription.user_id == user_id))).all()
+            payments = (await db.scalars(select(Payment.id).where(Payment.user_id == user_id))).all()
+        return user_id, response, remaining, subscriptions, payments
+
+    user_id, response, remaining, subscriptions, payments = run(scenario())
+
+    assert response.status_code == 200, response.text
+    assert remaining is None
+    assert subscriptions == []
+    assert payments == []
+    assert user_cache.get(user_id) is None
+    assert quota_cache.get(user_id) is None